@@ -0,0 +1,38 @@
+"""
+Combined `TraceHighlighter` against the regexes of `ReprHighlighter`, per
+trace line
+
+    $ pip install .
+    $ python benchmarks/highlighter.py
+"""
+
+import timeit
+
+from rich.text import Text
+
+from fortuna.tracer.highlighter import ReprHighlighter, TraceHighlighter
+
+LINES = [
+    "Fortuna.random_data(nbytes=32) ...",
+    "    Generator.pseudo_randomdata(bytes=32) ...",
+    "        Generator._encrypt(key=0x<+20...>A3B4C5D6E7, plaintext=0x<+27...>0000000000) -> 0xB1E4<...+ 28>A90F",
+    "        Generator.counter=35",
+    "    -> 0x3A4F19C2<...+ 16>77E1D0B9",
+    "    Generator.generate_blocks(blocks=2) -X FortunaNotSeeded('Generate error, PRNG not seeded yet')",
+    "Fortuna.add_random_event(source=1, pool=3, data=b'\\x01\\x02') -> None",
+]
+
+
+def main(number=20_000):
+    for name, highlighter in [
+        ("ReprHighlighter", ReprHighlighter()),
+        ("TraceHighlighter", TraceHighlighter()),
+    ]:
+        elapsed = timeit.timeit(
+            lambda: [highlighter(Text(line)) for line in LINES], number=number
+        )
+        print("%-20s %6.2f us/line" % (name, elapsed / number / len(LINES) * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Compiled `Template` against string.Formatter parsing the template every time
+
+    $ pip install .
+    $ python benchmarks/template.py
+"""
+
+import timeit
+
+from fortuna.formatters.bytes_formatter import Formatter
+from fortuna.formatters.bytes_formatter import Template as T
+
+CASES = [
+    ("0x{:^50X}", (bytes(range(32)),), {}),
+    (
+        "key=0x{key:25X}, plaintext=0x{plaintext:>25X}",
+        (),
+        {"key": bytes(32), "plaintext": bytes(64)},
+    ),
+    (
+        "source={source!r}, pool={pool}, data=0x{data:X}",
+        (),
+        {"source": 1, "pool": 3, "data": b"\x01\x02"},
+    ),
+]
+
+
+def main(number=50_000):
+    for template, args, kwargs in CASES:
+        compiled = T(template)
+        old = timeit.timeit(
+            lambda: Formatter().format(template, *args, **kwargs), number=number
+        )
+        new = timeit.timeit(lambda: compiled.format(*args, **kwargs), number=number)
+        print(
+            "%-50s %6.2f us -> %6.2f us (x%.1f)"
+            % (template, old / number * 1e6, new / number * 1e6, old / new)
+        )
+
+
+if __name__ == "__main__":
+    main()
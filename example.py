@@ -13,10 +13,13 @@ import tty
 from rich.console import Console
 from rich.logging import RichHandler
 
-from fortuna import Fortuna, FortunaSeedFileError
+from fortuna import Fortuna, FortunaSeedFileError, tracer
 from fortuna.formatters.pools import format_pools
 from fortuna.generator import FortunaNotSeeded
+from fortuna.sources import EntropySource
 from fortuna.tracer import highlighter as tracer_highlighter
+from fortuna.tracer.chrome import ChromeTraceExporter
+from fortuna.tracer.recorder import FlightRecorder
 
 LOG = logging.getLogger(__name__)
 
@@ -26,12 +29,6 @@ class Source(enum.IntEnum):
     KEY_VALUE = 1
 
 
-pool_counter = {
-    Source.TIMESTAMP: 0,
-    Source.KEY_VALUE: 0,
-}
-
-
 def configure_logging():
     console = Console(theme=tracer_highlighter.theme)
     # from fortuna import tracer
@@ -41,16 +38,15 @@ def configure_logging():
         log_time_format="[%X]",
         # tracebacks_suppress=[tracer],
         tracebacks_show_locals=True,
-        highlighter=tracer_highlighter.ReprHighlighter(),
+        highlighter=tracer_highlighter.TraceHighlighter(),
         console=console,
         show_path=False,  # it has less info using logdecorator. I can't overwirte %(module)s:%(lineno) even with functools.wrap
     )
-    logging.basicConfig(
-        level=logging.DEBUG,
-        handlers=[handler],
-        # format="%(relativeCreated)d %(message)s",
-        format="%(message)s",
-    )
+    # format="%(relativeCreated)d %(message)s",
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logging.getLogger().setLevel(logging.DEBUG)
+    # rendered in a background thread, not by the thread generating randomness
+    tracer.configure_async_sink(handler)
 
 
 def get_columns():
@@ -83,25 +79,17 @@ def add_entropy(source=Source.KEY_VALUE):
             except KeyboardInterrupt:
                 break
             if source is Source.KEY_VALUE:
-                fortuna.add_random_event(
-                    Source.KEY_VALUE, pool_counter[Source.KEY_VALUE], char.encode()
-                )
-                pool_counter[Source.KEY_VALUE] += 1
-                pool_counter[Source.KEY_VALUE] %= 32
+                fortuna.sources[Source.KEY_VALUE].add_event(char.encode())
             elif source is Source.TIMESTAMP:
                 assert time.clock_getres(time.CLOCK_MONOTONIC_RAW) >= 1e-9
                 nanoseconds = time.clock_gettime_ns(time.CLOCK_MONOTONIC_RAW)
                 seconds = int(nanoseconds / 1e9)
                 nbytes = math.ceil(int(1e9).bit_length() / 8)
 
-                fortuna.add_random_event(
-                    Source.TIMESTAMP,
-                    pool_counter[Source.TIMESTAMP],
+                fortuna.sources[Source.TIMESTAMP].add_event(
                     # only add nanosecond portion
                     int(nanoseconds - seconds * 1e9).to_bytes(nbytes, "little"),
                 )
-                pool_counter[Source.TIMESTAMP] += 1
-                pool_counter[Source.TIMESTAMP] %= 32
 
 
 @contextlib.contextmanager
@@ -116,6 +104,7 @@ def log_known_exception():
 
 class Cmd(cmd.Cmd):
     prompt = "(fortuna) "
+    exporter = None
 
     def do_random(self, arg):
         """
@@ -137,6 +126,30 @@ class Cmd(cmd.Cmd):
     def do_update_seed_file(self, arg):
         fortuna.update_seed_file()
 
+    def do_dump_trace(self, arg):
+        """
+        print the last traces kept by the flight recorder
+        """
+        recorder.dump(sys.stdout)
+
+    def do_start_trace(self, arg):
+        """
+        capture Chrome trace events until export_trace
+        """
+        self.exporter = ChromeTraceExporter().start()
+
+    def do_export_trace(self, arg):
+        """
+        export_trace [file]
+        save the capture as Chrome trace events, to open in https://ui.perfetto.dev
+        """
+        if self.exporter is None:
+            LOG.error("no capture, run start_trace first")
+            return
+        self.exporter.stop()
+        self.exporter.save(arg or "trace.json")
+        self.exporter = None
+
     def do_EOF(self, arg):
         return True
 
@@ -149,7 +162,9 @@ class Cmd(cmd.Cmd):
     def do_print_pools(self, arg):
         print(
             format_pools(
-                fortuna.pools, list(pool_counter.values()), width=get_columns()
+                fortuna.pools,
+                [source.pool for source in fortuna.sources],
+                width=get_columns(),
             )
         )
 
@@ -170,7 +185,11 @@ class Cmd(cmd.Cmd):
 
 if __name__ == "__main__":
     configure_logging()
+    recorder = tracer.install(FlightRecorder())
     fortuna = Fortuna(seed_file="./seed_file")
+    for source in Source:
+        # events are pushed by the key presses, not collected in background
+        fortuna.sources.register(EntropySource(source))
     Cmd().cmdloop()
     try:
         fortuna.write_seed_file()
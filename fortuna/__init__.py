@@ -1,11 +1,19 @@
+import contextlib
+import itertools
 import logging
+import os
+import threading
+import weakref
 from io import IOBase
 from pathlib import Path
-from time import time
+from time import perf_counter_ns, time, time_ns
 
 from fortuna.formatters.bytes_formatter import Template as T
-from fortuna.generator import Generator, sha_double_256
-from fortuna.tracer import TracedSet, trace_function, trace_method
+from fortuna.generator import MAX_BYTES, Generator
+from fortuna.metrics import Metrics
+from fortuna.pool import HashPool, RawPool
+from fortuna.sources import SourceRegistry
+from fortuna.tracer import TracedSet, trace_function, trace_method, traced_slots
 
 MINPOOLSIZE = 64
 
@@ -18,16 +26,80 @@ class FortunaSeedFileError(Exception): ...
 class FortunaSeedFileEmpty(FortunaSeedFileError): ...
 
 
+# instances to reseed after os.fork
+_instances = weakref.WeakSet()
+
+
+def _before_fork():
+    for fortuna in list(_instances):
+        fortuna._before_fork()
+
+
+def _after_fork_in_parent():
+    for fortuna in list(_instances):
+        fortuna._after_fork_in_parent()
+
+
+def _after_fork_in_child():
+    for fortuna in list(_instances):
+        fortuna._after_fork_in_child()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(
+        before=_before_fork,
+        after_in_parent=_after_fork_in_parent,
+        after_in_child=_after_fork_in_child,
+    )
+
+
+@traced_slots
 class Fortuna:
+    __slots__ = (
+        "__weakref__",  # for `_instances`
+        "pools",
+        "thread_safe",
+        "_pool_locks",
+        "_next_pool_lock",
+        "_seed_lock",
+        "_generator_lock",
+        "prefork",
+        "_next_pool",
+        "generator",
+        "sources",
+        "last_seed",
+        "reseed_scheduler",
+        "_pending_seed",
+        "seed_file",
+        "_metrics",
+    )
 
     reseed_cnt = TracedSet()
 
-    @trace_function(args_fmt='seed_file="{seed_file}"')
-    def __init__(self, seed_file: IOBase | Path | None = None):
-        self.pools = [bytearray() for i in range(32)]
+    @trace_function(
+        args_fmt='seed_file="{seed_file}", thread_safe={thread_safe}, prefork={prefork}, hash_pools={hash_pools}'
+    )
+    def __init__(
+        self,
+        seed_file: IOBase | Path | None = None,
+        thread_safe: bool = False,
+        prefork: bool = False,
+        hash_pools: bool = False,
+    ):
+        pool_class = HashPool if hash_pools else RawPool
+        self.pools = [pool_class() for i in range(32)]
+        self.thread_safe = thread_safe
+        self._init_locks()
+        self.prefork = prefork
+        _instances.add(self)
         self.reseed_cnt = 0
+        self._next_pool = [0] * 256  # per source, for `add_random_events`
         self.generator = Generator()
+        self.sources = SourceRegistry(self)
         self.last_seed = 0  # timestamp to calculate time difference
+        self.reseed_scheduler = None  # see `fortuna.scheduler.ReseedScheduler`
+        self._pending_seed = None
+        self._metrics = Metrics()
 
         if seed_file is None:
             self.seed_file = None
@@ -52,22 +124,101 @@ class Fortuna:
             except FortunaSeedFileEmpty:
                 LOG.info('seed file ("%s") is empty', seed_file)
 
+    def _init_locks(self):
+        # Producers only take the lock of the pool they write, so they don't
+        # contend with consumers, which take the generator lock. When reseeding
+        # the pool locks are taken after the generator one.
+        new_lock = threading.Lock if self.thread_safe else contextlib.nullcontext
+        self._pool_locks = [new_lock() for i in range(32)]
+        self._next_pool_lock = new_lock()  # rotation of `add_random_events`
+        # `reseed_cnt` and draining the pools. Taken after the generator lock
+        self._seed_lock = new_lock()
+        self._generator_lock = (
+            threading.RLock() if self.thread_safe else contextlib.nullcontext()
+        )
+
+    def _before_fork(self):
+        # the generator must not be forked in the middle of a request
+        self._generator_lock.__enter__()
+        if self.seed_file is not None:
+            # otherwise the buffered writes would be done by both processes
+            self.seed_file.flush()
+
+    def _after_fork_in_parent(self):
+        self._generator_lock.__exit__(None, None, None)
+
+    @trace_method
+    def _after_fork_in_child(self):
+        # locks held by other threads of the parent would never be released
+        self._init_locks()
+        self.sources._after_fork_in_child()
+        if self.reseed_scheduler is not None:
+            # its thread was not copied, reseed in the request path again
+            self.reseed_scheduler = None
+            self._pending_seed = None
+        if self.prefork:
+            # the parent keeps updating the seed file, not the workers
+            self.seed_file = None
+        if self.generator.counter == 0:
+            return  # not seeded, so it won't repeat the output of the parent
+        # The key already has the entropy of the accumulator, just make it
+        # diverge from the parent (and from other children) without reading
+        # the seed file
+        seed = os.getpid().to_bytes(4, "little") + time_ns().to_bytes(8, "little")
+        self.generator.reseed(seed)
+
     @trace_method
     def reseed_from_pools(self):
-        self.reseed_cnt += 1
-        s = bytearray()
-        for i in range(32):
-            if self.reseed_cnt % 2**i == 0:
-                s += sha_double_256(self.pools[i])
-                del self.pools[i][:]
-            else:
-                break  # optimization sugested by the book
-        self.generator.reseed(s)
-        self.last_seed = time()
+        with self._generator_lock:
+            self.generator.reseed(self._collect_seed())
+            self.last_seed = time()
+
+    def _collect_seed(self) -> bytearray:
+        with self._seed_lock:
+            start = perf_counter_ns()
+            self.reseed_cnt += 1
+            s = bytearray()
+            for i in range(32):
+                if self.reseed_cnt % 2**i == 0:
+                    with self._pool_locks[i]:
+                        s += self.pools[i].double_digest()
+                        self.pools[i].clear()
+                else:
+                    break  # optimization sugested by the book
+            self._metrics.reseed.add(perf_counter_ns() - start)
+            return s
+
+    def _reseed_due(self) -> bool:
+        return len(self.pools[0]) >= MINPOOLSIZE and (time() - self.last_seed) > 0.1
+
+    def _reseed_if_needed(self):
+        if self.reseed_scheduler is None:
+            if self._reseed_due():
+                self.reseed_from_pools()
+        elif self._pending_seed is not None:
+            # the pools were already hashed by the scheduler
+            seed, self._pending_seed = self._pending_seed, None
+            self.generator.reseed(seed)
+            self.last_seed = time()
+
+    def _prepare_seed(self) -> bool:
+        """
+        Called by the `ReseedScheduler`, out of the request path. Hashes the
+        pools into a seed that the next request swaps in.
+        """
+        if self._pending_seed is not None or not self._reseed_due():
+            return False
+        seed = self._collect_seed()
+        with self._generator_lock:
+            self._pending_seed = seed
+        return True
 
     def random_data(self, nbytes: int):
-        if len(self.pools[0]) >= MINPOOLSIZE and (time() - self.last_seed) > 0.1:
-            self.reseed_from_pools()
+        with self._generator_lock:
+            return self._random_data(nbytes)
+
+    def _random_data(self, nbytes: int):
+        self._reseed_if_needed()
 
         # # this is 2 lines are from the pseoudocode of the book. Commented because:
         # #   - the exception will be already raised in generator.pseudo_randomdata
@@ -75,7 +226,52 @@ class Fortuna:
         # if self.reseed_cnt == 0:
         #     raise FortunaNotSeeded("Generate error, PRNG not seeded yet")
 
-        return self.generator.pseudo_randomdata(nbytes)
+        r = self.generator.pseudo_randomdata(nbytes)
+        self._metrics.requests += 1
+        self._metrics.bytes_generated += nbytes
+        return r
+
+    def random_into(self, buffer):
+        """
+        Fill any writable buffer (bytearray, mmap, array, numpy array...) in
+        place. Buffers bigger than MAX_BYTES are filled in several windows,
+        rekeying after each one.
+        """
+        view = memoryview(buffer).cast("B")
+        with self._generator_lock:
+            self._reseed_if_needed()
+            for start in range(0, len(view), MAX_BYTES):
+                self.generator.generate_into(view[start : start + MAX_BYTES])
+            self._metrics.requests += 1
+            self._metrics.bytes_generated += len(view)
+
+    def random_many(self, sizes) -> list[memoryview]:
+        """
+        Serve several requests with a single reseed check and rekey. The
+        result are read-only views of one buffer, one per size, so the total
+        is limited to MAX_BYTES.
+        """
+        sizes = list(sizes)
+        assert all(nbytes >= 0 for nbytes in sizes)
+        data = memoryview(self.random_data(sum(sizes))).toreadonly()
+        return [
+            data[end - nbytes : end]
+            for nbytes, end in zip(sizes, itertools.accumulate(sizes))
+        ]
+
+    def stream(self, total_bytes: int | None = None, chunk_size: int = 2**16):
+        """
+        Yield chunks of random data lazily, forever if `total_bytes` is None.
+        Each chunk is a separate request, so the generator is rekeyed at least
+        every MAX_BYTES and only one chunk is alive at a time.
+        """
+        assert 0 < chunk_size <= MAX_BYTES
+        remaining = total_bytes
+        while remaining is None or remaining > 0:
+            nbytes = chunk_size if remaining is None else min(chunk_size, remaining)
+            yield self.random_data(nbytes)
+            if remaining is not None:
+                remaining -= nbytes
 
     @trace_function(
         args_fmt=T("source={source!r}, pool={pool}, data=0x{data:X}"), merge=True
@@ -84,29 +280,125 @@ class Fortuna:
         assert 1 <= len(data) <= 32
         assert 0 <= source <= 255
         assert 0 <= pool <= 31
-        self.pools[pool] += bytes([source, len(data)]) + data
-        # Even though book says "Implementations do not need to store the
-        # unbounded string, but can computethe hash of the string incrementally
-        # as it is assembled in the pool" not doing the hash here:
+        with self._pool_locks[pool]:
+            self.pools[pool] += bytes([source, len(data)]) + data
+        # By default the pools are RawPool instead of HashPool:
         #   x it is a waste of memory
         #   ✓ save time to entropy sources, which are typically real-time drivers
-        #   ✓ simpler because you don't have to maintain a counter, just do `len(pool)`
         #   ✓ easier to debug since you can see the history
 
+    @trace_function(args_fmt="source={source!r}", merge=True)
+    def add_random_events(self, source: int, events, pools=None, *, width=None):
+        """
+        Add many events of `source` at once, spread round-robin over `pools`.
+        If `pools` is None, all of them are used starting where the previous
+        call for this source finished.
+
+        `events` is either an iterable of bytes or a buffer (bytes, array,
+        numpy array...) of samples of `width` bytes, which defaults to the
+        item size of the buffer.
+        """
+        assert 0 <= source <= 255
+        if pools is not None:
+            pools = list(pools)
+            assert pools and all(0 <= pool <= 31 for pool in pools)
+
+        # chunks are per position in the rotation, not per pool
+        npools = 32 if pools is None else len(pools)
+        try:
+            view = memoryview(events)
+        except TypeError:
+            chunks, count = self._pool_chunks(source, events, npools)
+        else:
+            width = width or view.itemsize
+            chunks, count = self._pool_chunks_fixed(
+                source, view.cast("B"), width, npools
+            )
+
+        if pools is None:
+            # reserve the pools, so producers of the same source don't overlap
+            with self._next_pool_lock:
+                start = self._next_pool[source]
+                self._next_pool[source] = (start + count) % 32
+            pools = [(start + i) % 32 for i in range(32)]
+
+        for pool, chunk in zip(pools, chunks):
+            if chunk:
+                with self._pool_locks[pool]:
+                    self.pools[pool] += chunk
+
+    @staticmethod
+    def _pool_chunks(source, events, npools):
+        headers = [bytes([source, length]) for length in range(33)]
+        parts = [[] for i in range(npools)]
+        count = 0
+        for count, data in enumerate(events, 1):
+            assert 1 <= len(data) <= 32
+            part = parts[(count - 1) % npools]
+            part.append(headers[len(data)])
+            part.append(data)
+        return [b"".join(part) for part in parts], count
+
+    @staticmethod
+    def _pool_chunks_fixed(source, data: memoryview, width, npools):
+        """
+        Like `_pool_chunks` for samples of the same width. Each chunk is built
+        with extended slice assignments, column by column, so the number of
+        Python operations does not depend on the number of samples.
+        """
+        assert 1 <= width <= 32
+        count, rest = divmod(len(data), width)
+        assert rest == 0, "buffer size is not a multiple of the sample width"
+        step = width + 2
+        chunks = []
+        for i in range(npools):
+            n = len(range(i, count, npools))
+            chunk = bytearray(n * step)
+            if n:
+                chunk[0::step] = bytes([source]) * n
+                chunk[1::step] = bytes([width]) * n
+                for column in range(width):
+                    chunk[column + 2 :: step] = data[
+                        i * width + column :: npools * width
+                    ]
+            chunks.append(chunk)
+        return chunks, count
+
+    def metrics(self) -> dict:
+        """
+        Counters and gauges of the generator, the pools and the seed file.
+        See `fortuna.metrics` to export them to Prometheus.
+        """
+        m = self._metrics
+        reseed_cnt = self.reseed_cnt
+        return {
+            "bytes_generated": m.bytes_generated,
+            "requests": m.requests,
+            "reseeds": reseed_cnt,
+            # pool i is drained every 2**i reseeds
+            "pool_reseeds": [reseed_cnt >> i for i in range(32)],
+            "pool_size_bytes": [len(pool) for pool in self.pools],
+            "reseed_seconds": m.reseed.snapshot(),
+            "seconds_since_reseed": time() - self.last_seed if self.last_seed else None,
+            "seed_file_write_seconds": m.seed_file_write.snapshot(),
+        }
+
     def write_seed_file(self):
         """
         IMO this should only called by APP when seed file is empty, the first time that is seeded at least at the end
         """
         # TODO: add __del__ method that call this or update depending on existence?
-        self._overwrite_seed_file(self.random_data(64))
+        with self._generator_lock:
+            self._overwrite_seed_file(self._random_data(64))
 
     def update_seed_file(self):
         """
         IMO this should be called periodically or at the end
         """
-        s = self._read_seed_file()
-        self.generator.reseed(s)
-        self._overwrite_seed_file(self.random_data(64))
+        with self._generator_lock:
+            s = self._read_seed_file()
+            self.generator.reseed(s)
+            self._overwrite_seed_file(self._random_data(64))
 
     @trace_method(ret_fmt=T("0x{:50X}"), merge=True)
     def _read_seed_file(self):
@@ -121,5 +413,7 @@ class Fortuna:
 
     @trace_function(args_fmt=T("0x{data:50X}"), merge=True)
     def _overwrite_seed_file(self, data):
+        start = perf_counter_ns()
         self.seed_file.seek(0)
         self.seed_file.write(data)
+        self._metrics.seed_file_write.add(perf_counter_ns() - start)
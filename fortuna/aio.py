@@ -0,0 +1,83 @@
+import asyncio
+import inspect
+import itertools
+import logging
+
+from fortuna import Fortuna
+
+LOG = logging.getLogger(__name__)
+
+EXECUTOR_THRESHOLD = 2**12  # bytes. Bigger requests are generated in the executor
+
+
+class AsyncFortuna:
+    """
+    asyncio front-end of `Fortuna`. Big requests are generated in an executor,
+    so the event loop is not blocked while encrypting.
+    """
+
+    def __init__(
+        self,
+        fortuna: Fortuna | None = None,
+        executor=None,
+        threshold: int = EXECUTOR_THRESHOLD,
+    ):
+        if fortuna is None:
+            fortuna = Fortuna(thread_safe=True)
+        elif not fortuna.thread_safe:
+            raise ValueError(
+                "Fortuna is used from executor threads, it must be thread safe"
+            )
+        self.fortuna = fortuna
+        self.executor = executor  # None is the default executor of the loop
+        self.threshold = threshold
+        self._tasks = set()
+
+    async def random_data(self, nbytes: int):
+        lock = self.fortuna._generator_lock
+        # A small request is served in the loop only if the generator is not
+        # busy, e.g. with a big request of the executor. Otherwise the whole
+        # loop would wait for the lock
+        if nbytes < self.threshold and lock.acquire(blocking=False):
+            try:
+                return self.fortuna.random_data(nbytes)
+            finally:
+                lock.release()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, self.fortuna.random_data, nbytes
+        )
+
+    async def add_random_event(self, source: int, pool: int, data: bytes):
+        # only appends to a pool, not worth an executor
+        self.fortuna.add_random_event(source, pool, data)
+
+    def add_source(self, source: int, collect, interval: float) -> asyncio.Task:
+        """
+        Start a task that calls `collect` every `interval` seconds and adds the
+        returned bytes as an event of `source`, rotating the pools. `collect`
+        can be a function or a coroutine function.
+        """
+        task = asyncio.create_task(self._feed(source, collect, interval))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _feed(self, source, collect, interval):
+        pools = itertools.cycle(range(32))
+        while True:
+            try:
+                data = collect()
+                if inspect.isawaitable(data):
+                    data = await data
+                await self.add_random_event(source, next(pools), data)
+            except Exception:
+                # a failing collection must not stop the source
+                LOG.exception("entropy source %d failed", source)
+            await asyncio.sleep(interval)
+
+    async def aclose(self):
+        """cancel the source tasks"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -1,3 +1,4 @@
+import itertools
 import re
 import string
 from collections import UserString
@@ -10,8 +11,14 @@ class Trim(StrEnum):
     RIGHT = auto()
 
 
-def format_overflow(data: str, max_width, trim=Trim.LEFT, print_total=False):
+def format_overflow(
+    data: "str | bytes | BytesSnapshot", max_width, trim=Trim.LEFT, print_total=False
+):
     """
+    `data` is either an hexadecimal string or raw bytes. Raw bytes are only
+    converted to hexadecimal in the visible slices, so the cost does not
+    depend on the size of `data`.
+
     >>> format_overflow('3031323334', max_width = 10)
     '3031323334'
     >>> format_overflow('3031323334', max_width = 9)
@@ -36,23 +43,38 @@ def format_overflow(data: str, max_width, trim=Trim.LEFT, print_total=False):
 
     >>> format_overflow('30313233343536373839', max_width = 18, trim='center')
     '303132<...+ 5>3839'
+
+    >>> format_overflow(b'0123456789', max_width = 18, trim='center')
+    '303132<...+ 5>3839'
+    >>> format_overflow(bytes([0xAB, 0xCD]), max_width = 4)
+    'ABCD'
     """
-    if len(data) <= max_width:
-        return data
+    if isinstance(data, str):
+        length = len(data)
+        hexa = data.__getitem__
+    elif isinstance(data, BytesSnapshot):
+        length = 2 * data.nbytes
+        hexa = data.hexa
+    else:
+        length = 2 * len(data)
+        view = memoryview(data)
+
+        def hexa(s: slice):
+            return view[s.start // 2 : s.stop // 2].hex().upper()
+
+    if length <= max_width:
+        return hexa(slice(0, length))
 
-    len_bytes, rest = divmod(len(data), 2)
+    len_bytes, rest = divmod(length, 2)
     assert rest == 0, "not hexa"
 
-    fmt = "%s{: >%d}" % ("=" if print_total else "+", len(str(len_bytes)))
-    if trim == Trim.LEFT:
-        fmt = "<%s...>" % fmt
-    else:
-        fmt = "<...%s>" % fmt
-    visible_length = max_width - len(fmt.format(0))
+    digits = len(str(len_bytes))
+    descriptor_length = digits + 6  # "<", "+" or "=", "...", ">"
+    visible_length = max_width - descriptor_length
 
     if visible_length < 0:
         msg = "even trimmed descriptor with length %d does not fit in max width %d" % (
-            len(fmt.format(0)),
+            descriptor_length,
             max_width,
         )
         raise ValueError(msg)
@@ -63,51 +85,202 @@ def format_overflow(data: str, max_width, trim=Trim.LEFT, print_total=False):
         visible_length -= 1
         # downside: the whole max_width won't be leveraged
 
-    trimmed_descriptor = fmt.format(
-        len_bytes if print_total else len_bytes - visible_length_bytes
+    count = "%s%*d" % (
+        "=" if print_total else "+",
+        digits,
+        len_bytes if print_total else len_bytes - visible_length_bytes,
     )
     if trim == Trim.LEFT:
-        return (
-            trimmed_descriptor + data[len(data) - visible_length :]
-        )  # https://stackoverflow.com/questions/11337941/python-negative-zero-slicing
+        trimmed_descriptor = "<%s...>" % count
+    else:
+        trimmed_descriptor = "<...%s>" % count
+    if trim == Trim.LEFT:
+        return trimmed_descriptor + hexa(slice(length - visible_length, length))
     elif trim == Trim.CENTER:
         # avoid unpair an hexa byte
         half, rest = divmod(visible_length_bytes, 2)
-        return data[: (half + rest) * 2] + trimmed_descriptor + data[-half * 2 :]
-    return data[:visible_length] + trimmed_descriptor
+        head = hexa(slice(0, (half + rest) * 2))
+        tail = hexa(slice(length - half * 2, length))
+        return head + trimmed_descriptor + tail
+    return hexa(slice(0, visible_length)) + trimmed_descriptor
 
 
 PATTERN = re.compile(r"(?P<align><|\^|>)?(?P<alternate>#)?(?P<width>\d*)?X")
 
 
+ALIGN_TRIM = {"<": Trim.LEFT, ">": Trim.RIGHT, "^": Trim.CENTER, None: Trim.LEFT}
+
+
+def parse_hex_spec(format_spec):
+    """
+    Split the ``X`` part of a format spec. Return None if it has no ``X``,
+    otherwise the rest of the spec and the arguments of `format_hex`
+
+    >>> parse_hex_spec(">#18X")
+    ('', 18, <Trim.RIGHT: 'right'>, False)
+    >>> parse_hex_spec("X") is None, parse_hex_spec("d")
+    (False, None)
+    """
+    if match := PATTERN.search(format_spec):
+        width = match.group("width")
+        return (
+            format_spec[: match.start()] + format_spec[match.end() :],
+            int(width) if width else None,
+            ALIGN_TRIM[match.group("align")],
+            match.group("alternate") is None,
+        )
+    return None
+
+
+def format_hex(value: "bytes | BytesSnapshot", width, trim, print_total):
+    if width is None:
+        return value.hex().upper()
+    # only the visible part is converted to hexadecimal
+    return format_overflow(value, width, trim, print_total=print_total)
+
+
+class BytesSnapshot:
+    """
+    Length and edges of a bytes-like value, kept instead of the value so that
+    it can be formatted later without holding (or pinning) the buffer. At most
+    `EDGE` bytes of each end are kept, so it is rendered trimmed to them.
+
+    >>> snapshot = BytesSnapshot(bytearray(range(100)))
+    >>> snapshot.nbytes, format(snapshot, "50X")
+    (100, '<=100...>5C5D5E5F60616263')
+    >>> format(BytesSnapshot(b"\\x01\\x02"), "X"), BytesSnapshot(b"\\x01\\x02")
+    ('0102', b'\\x01\\x02')
+    """
+
+    __slots__ = ("nbytes", "head", "tail", "type_name")
+    EDGE = 8
+
+    def __init__(self, data):
+        view = memoryview(data)
+        self.type_name = type(data).__name__
+        self.nbytes = view.nbytes
+        if not view.c_contiguous:
+            view = memoryview(view.tobytes())
+        view = view.cast("B")
+        if self.nbytes <= 2 * self.EDGE:
+            self.head, self.tail = bytes(view), b""
+        else:
+            self.head, self.tail = bytes(view[: self.EDGE]), bytes(view[-self.EDGE :])
+
+    def __len__(self):
+        return self.nbytes
+
+    def __repr__(self):
+        if not self.tail:
+            return repr(self.head)
+        return "<%s of %d bytes>" % (self.type_name, self.nbytes)
+
+    def hex(self) -> str:
+        assert not self.tail, "not kept in the snapshot"
+        return self.head.hex()
+
+    def hexa(self, s: slice) -> str:
+        """hexadecimal of a slice of the hexadecimal, within the edges"""
+        start, stop = s.start // 2, s.stop // 2
+        if stop <= len(self.head):
+            return self.head[start:stop].hex().upper()
+        offset = self.nbytes - len(self.tail)
+        assert start >= offset, "not kept in the snapshot"
+        return self.tail[start - offset : stop - offset].hex().upper()
+
+    def __format__(self, format_spec):
+        hex_spec = parse_hex_spec(format_spec)
+        if hex_spec is None:
+            return format(repr(self), format_spec)
+        format_spec, width, trim, print_total = hex_spec
+        if self.tail:
+            # never show more than one edge of the value
+            digits = len(str(self.nbytes))
+            limit = 2 * self.EDGE + digits + 6
+            width = limit if width is None else min(width, limit)
+        return format(format_hex(self, width, trim, print_total), format_spec)
+
+
 class Formatter(string.Formatter):
     def format_field(self, value, format_spec):
         if isinstance(value, (bytes, bytearray)):
-            if match := PATTERN.search(format_spec):
-                format_spec = format_spec[: match.start()] + format_spec[match.end() :]
-                value = value.hex().upper()
-                if width := match.group("width"):
-                    align = Trim.LEFT
-                    align = {
-                        "<": Trim.LEFT,
-                        ">": Trim.RIGHT,
-                        "^": Trim.CENTER,
-                        None: Trim.LEFT,
-                    }[match.group("align")]
-                    value = format_overflow(
-                        value,
-                        int(width),
-                        align,
-                        print_total=match.group("alternate") is None,
-                    )
+            if hex_spec := parse_hex_spec(format_spec):
+                format_spec, *hex_args = hex_spec
+                value = format_hex(value, *hex_args)
         return super().format_field(value, format_spec)
 
 
+_FORMATTER = Formatter()
+_CONVERSIONS = {None: None, "r": repr, "s": str, "a": ascii}
+
+
+class _Field:
+    """a replacement field of a `Template`, parsed when compiling it"""
+
+    __slots__ = ("index", "name", "path", "convert", "format_spec", "hex_spec")
+
+    def __init__(self, field_name, conversion, format_spec):
+        # positional index, keyword name or, for attributes and items, the
+        # whole field name resolved by string.Formatter
+        self.index = int(field_name) if field_name.isdigit() else None
+        self.name = field_name if field_name.isidentifier() else None
+        self.path = field_name if self.index is None and self.name is None else None
+        self.convert = _CONVERSIONS[conversion]
+        self.format_spec = format_spec
+        self.hex_spec = parse_hex_spec(format_spec)
+
+    def render(self, args, kwargs):
+        if self.index is not None:
+            value = args[self.index]
+        elif self.name is not None:
+            value = kwargs[self.name]
+        else:
+            value, _ = _FORMATTER.get_field(self.path, args, kwargs)
+        if self.convert is not None:
+            value = self.convert(value)
+        format_spec = self.format_spec
+        if self.hex_spec is not None and isinstance(value, (bytes, bytearray)):
+            format_spec, *hex_args = self.hex_spec
+            value = format_hex(value, *hex_args)
+        return format(value, format_spec)
+
+
 class Template(UserString):
     """
     inspired in https://github.com/mkdocs/mkdocs/blob/53fec50e57f6bad152ad589a83ae83d1cd72b2f5/mkdocs/config/config_options.py#L640
+
+    The template is parsed once, the first time it is formatted, into a list of
+    literals and fields with the ``X`` specs already resolved.
+
+    >>> Template("{!r}, {1}, {b.real:>4}, 0x{c:^12X}").format("a", 2, b=3, c=bytes(9))
+    "'a', 2,    3, 0x00<...=9>00"
     """
 
+    _plan = None
+
     def format(self_, *args, **kwargs):
-        fmt = Formatter()
-        return fmt.format(str(self_), *args, **kwargs)
+        plan = self_._plan
+        if plan is None:
+            plan = self_._plan = self_._compile()
+        if plan is False:
+            return _FORMATTER.format(str(self_), *args, **kwargs)
+        return "".join(
+            [op if op.__class__ is str else op.render(args, kwargs) for op in plan]
+        )
+
+    def _compile(self_):
+        plan = []
+        auto_index = itertools.count()
+        for literal, field_name, format_spec, conversion in _FORMATTER.parse(
+            str(self_)
+        ):
+            if literal:
+                plan.append(literal)
+            if field_name is None:
+                continue
+            if "{" in format_spec:
+                return False  # nested fields are left to string.Formatter
+            if field_name == "" or field_name[0] in ".[":
+                field_name = str(next(auto_index)) + field_name
+            plan.append(_Field(field_name, conversion, format_spec))
+        return plan
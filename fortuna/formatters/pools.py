@@ -38,6 +38,22 @@ def _get_templates(n_pools, n_sources, width):
     return template, pointer_template, hex_width
 
 
+def _format_pool(pool, width):
+    """
+    >>> _format_pool(b"\\x01\\x02", 10)
+    '0102'
+    >>> from fortuna.pool import HashPool
+    >>> pool = HashPool()
+    >>> pool += bytes(34)
+    >>> _format_pool(pool, 10)
+    '<=34...>'
+    """
+    if isinstance(pool, (bytes, bytearray)):
+        return format_overflow(pool, width)
+    # a HashPool only knows how many bytes it has hashed
+    return "<=%d...>" % len(pool)
+
+
 def format_pools(pools, sources=(), width=27):
     """
     format is:
@@ -49,8 +65,7 @@ def format_pools(pools, sources=(), width=27):
     )
     res = ""
     for index, pool in enumerate(pools):
-        data = pool.hex().upper()
-        res += template.format(index, format_overflow(data, hex_width))
+        res += template.format(index, _format_pool(pool, hex_width))
         sources_pointing = list(_get_sources(index, sources))
         if sources_pointing:
             res += pointer_template.format(",".join(str(i) for i in sources_pointing))
@@ -1,33 +1,46 @@
 import logging
-import math
 from hashlib import sha256
 
 from cryptography.hazmat.primitives import ciphers
 
 from fortuna.formatters.bytes_formatter import Template as T
-from fortuna.tracer import TracedSet, trace_function
+from fortuna.tracer import TracedSet, trace_function, trace_property, traced_slots
 
 LOG = logging.getLogger(__name__)
 
+MAX_BYTES = 2**20  # maximum size of a request before rekeying
+CHUNK_BYTES = 2**16  # size of the keystream encrypted at once in `generate_into`
+
 
 class FortunaNotSeeded(Exception): ...
 
 
-@trace_function(
-    args_fmt=T("key=0x{key:25X}, plaintext=0x{plaintext:>25X}"),
-    ret_fmt=T("0x{:^25X}"),
-    merge=True,
-)
-def _encrypt(key: bytes, plaintext: bytes) -> bytes:
-    # TODO: separate construction and encryption to save time in key scheduling?
-    # TODO: use https://cryptography.io/en/latest/hazmat/primitives/symmetric-encryption/#cryptography.hazmat.primitives.ciphers.modes.CTR ?
+def _new_encryptor(key: bytes):
+    # CTR mode of cryptography is not used because it increments the counter
+    # as big endian, while Fortuna counter is little endian. ECB over the
+    # whole counter range gives the same result in a single call.
     cipher = ciphers.Cipher(ciphers.algorithms.AES(key), mode=ciphers.modes.ECB())
-    encryptor = cipher.encryptor()
-    return encryptor.update(plaintext)
+    return cipher.encryptor()
+
+
+def _wipe(buffer: bytearray):
+    buffer[:] = bytes(len(buffer))
+
+
+def counter_blocks(counter: int, blocks: int) -> bytes:
+    """
+    plaintext of `blocks` consecutive counter values, each one 16 bytes little endian
+
+    >>> counter_blocks(1, 2).hex()
+    '0100000000000000000000000000000002000000000000000000000000000000'
+    """
+    return b"".join(
+        [c.to_bytes(16, "little") for c in range(counter, counter + blocks)]
+    )
 
 
 def encrypt(key: bytes, counter: int) -> bytes:
-    return _encrypt(key, counter.to_bytes(16, "little"))
+    return _new_encryptor(key).update(counter_blocks(counter, 1))
 
 
 @trace_function(args_fmt=T("data=0x{data:^25X}"), ret_fmt=T("0x{:25X}"), merge=True)
@@ -35,14 +48,70 @@ def sha_double_256(data: bytes) -> bytes:
     return sha256(sha256(data).digest()).digest()
 
 
+@traced_slots
 class Generator:
-    key = TracedSet(T("0x{:^50X}"))
+    __slots__ = ("_key", "_encryptor")
     counter = TracedSet()
 
     def __init__(self):
+        self._key = bytearray()
+        self._encryptor = None  # cached for the current key
         self.key = b"\x00" * 32
         self.counter = 0
 
+    @property
+    def key(self) -> bytes:
+        # a copy, so callers never see the internal buffer being wiped
+        return bytes(self._key)
+
+    @trace_property(value_fmt=T("0x{:^50X}"))
+    @key.setter
+    def key(self, value: bytes):
+        # evict the encryptor of the old key, so key scheduling is done once per key
+        self._encryptor = None
+        # Only the internal copy of the old key is wiped. The immutable bytes
+        # it was created from (a sha_double_256 digest or the output of
+        # generate_blocks) and the key schedule inside the backend are freed
+        # but not overwritten, so this is a best effort.
+        _wipe(self._key)
+        self._key = bytearray(value)
+
+    @trace_function(
+        args_fmt=T("key=0x{self.key:25X}, plaintext=0x{plaintext:>25X}"),
+        ret_fmt=T("0x{:^25X}"),
+        merge=True,
+    )
+    def _encrypt(self, plaintext: bytes) -> bytes:
+        return self._get_encryptor().update(plaintext)
+
+    def _get_encryptor(self):
+        if self._encryptor is None:
+            self._encryptor = _new_encryptor(self.key)
+        # ECB keeps no state between updates, so the encryptor can be reused
+        return self._encryptor
+
+    def _keystream_into(self, view: memoryview):
+        """
+        Same output as `generate_blocks`, but written into `view`. Only a
+        scratch buffer of one chunk is allocated, whatever the request size.
+        """
+        encryptor = self._get_encryptor()
+        nbytes = len(view)
+        full = nbytes - nbytes % 16
+        counter = self.counter
+        # `update_into` needs room for an extra block minus one byte. Input and
+        # output don't overlap since in place encryption is not documented
+        scratch = memoryview(bytearray(min(CHUNK_BYTES, full) + 15))
+        for start in range(0, full, CHUNK_BYTES):
+            blocks = (min(start + CHUNK_BYTES, full) - start) // 16
+            written = encryptor.update_into(counter_blocks(counter, blocks), scratch)
+            view[start : start + written] = scratch[:written]
+            counter += blocks
+        if full < nbytes:
+            view[full:] = encryptor.update(counter_blocks(counter, 1))[: nbytes - full]
+            counter += 1
+        self.counter = counter
+
     @trace_function(args_fmt=T("seed=0x{seed:50X}"))
     def reseed(self, seed: bytes):
         self.key = sha_double_256(self.key + seed)
@@ -52,15 +121,27 @@ class Generator:
     def generate_blocks(self, blocks: int) -> bytes:
         if self.counter == 0:
             raise FortunaNotSeeded("Generate error, PRNG not seeded yet")
-        r = bytearray()
-        for i in range(blocks):
-            r += encrypt(self.key, self.counter)
-            self.counter += 1
+        r = self._encrypt(counter_blocks(self.counter, blocks))
+        self.counter += blocks
         return r
 
+    @trace_function(args_fmt="bytes={view.nbytes}")
+    def generate_into(self, view: memoryview):
+        """
+        Fill a writable buffer in place, without intermediate copies of the
+        whole request. The output is the same as `pseudo_randomdata`.
+        """
+        if self.counter == 0:
+            raise FortunaNotSeeded("Generate error, PRNG not seeded yet")
+        if view.readonly:
+            raise TypeError("buffer is read only")
+        assert 0 <= view.nbytes <= MAX_BYTES
+        self._keystream_into(view.cast("B"))
+        self.key = self.generate_blocks(2)
+
     @trace_function(args_fmt="bytes={nbytes}", ret_fmt=T("0x{:50X}"))
     def pseudo_randomdata(self, nbytes: int) -> bytes:
-        assert 0 <= nbytes <= 2**20
-        r = self.generate_blocks(math.ceil(nbytes / 16))[:nbytes]
-        self.key = self.generate_blocks(2)
+        assert 0 <= nbytes <= MAX_BYTES
+        r = bytearray(nbytes)
+        self.generate_into(memoryview(r))
         return r
@@ -0,0 +1,131 @@
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+
+class Timing:
+    """count, sum and maximum of a duration, in nanoseconds"""
+
+    __slots__ = ("count", "total_ns", "max_ns")
+
+    def __init__(self):
+        self.count = self.total_ns = self.max_ns = 0
+
+    def add(self, ns: int):
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.total_ns / 1e9,
+            "max": self.max_ns / 1e9,
+        }
+
+
+class Metrics:
+    """
+    Counters of a `Fortuna`. Each one is updated under a lock that is already
+    held at that point, so they cost an addition and take no lock of their own.
+    """
+
+    __slots__ = ("bytes_generated", "requests", "reseed", "seed_file_write")
+
+    def __init__(self):
+        self.bytes_generated = 0  # under the generator lock
+        self.requests = 0  # under the generator lock
+        self.reseed = Timing()  # under the seed lock
+        self.seed_file_write = Timing()  # under the generator lock
+
+
+# name, type, help and labels of the keys of `Fortuna.metrics`
+PROMETHEUS = [
+    ("bytes_generated", "counter", "Random bytes generated", None),
+    ("requests", "counter", "Requests of random data served", None),
+    ("reseeds", "counter", "Reseeds from the pools", None),
+    ("pool_reseeds", "counter", "Times each pool was drained", "pool"),
+    ("pool_size_bytes", "gauge", "Bytes in each pool", "pool"),
+    ("reseed_seconds", "summary", "Time to drain and hash the pools", None),
+    ("seconds_since_reseed", "gauge", "Time since the last reseed", None),
+    ("seed_file_write_seconds", "summary", "Time to write the seed file", None),
+]
+
+
+def to_prometheus(metrics: dict, prefix="fortuna") -> str:
+    """
+    Prometheus text exposition format of `Fortuna.metrics`
+
+    >>> print(to_prometheus({"requests": 3, "pool_size_bytes": [64, 0]}), end="")
+    # HELP fortuna_requests_total Requests of random data served
+    # TYPE fortuna_requests_total counter
+    fortuna_requests_total 3
+    # HELP fortuna_pool_size_bytes Bytes in each pool
+    # TYPE fortuna_pool_size_bytes gauge
+    fortuna_pool_size_bytes{pool="0"} 64
+    fortuna_pool_size_bytes{pool="1"} 0
+    """
+    lines = []
+    for key, type_, help_, label in PROMETHEUS:
+        if metrics.get(key) is None:
+            continue
+        value = metrics[key]
+        name = "%s_%s" % (prefix, key)
+        if type_ == "counter":
+            name += "_total"
+        lines.append("# HELP %s %s" % (name, help_))
+        lines.append("# TYPE %s %s" % (name, type_))
+        if label is not None:
+            for i, v in enumerate(value):
+                lines.append('%s{%s="%d"} %s' % (name, label, i, v))
+        elif type_ == "summary":
+            lines.append("%s_count %d" % (name, value["count"]))
+            lines.append("%s_sum %r" % (name, value["sum"]))
+            lines.append("# TYPE %s_max gauge" % name)
+            lines.append("%s_max %r" % (name, value["max"]))
+        else:
+            lines.append("%s %r" % (name, value))
+    return "".join(line + "\n" for line in lines)
+
+
+def write_prometheus(fortuna, path: str | Path, prefix="fortuna"):
+    """
+    Write the metrics to a file, e.g. for the textfile collector of the node
+    exporter. It is replaced atomically, so it is never read half written.
+    """
+    path = Path(path)
+    text = to_prometheus(fortuna.metrics(), prefix)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".%s." % path.name)
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def serve_prometheus(fortuna, port=9464, host="127.0.0.1", prefix="fortuna"):
+    """
+    Serve the metrics over HTTP from a daemon thread, on localhost by default.
+    Return the server, call its ``shutdown`` method to stop it.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = to_prometheus(fortuna.metrics(), prefix).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # scrapes are not worth a log line
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,45 @@
+from hashlib import sha256
+
+from fortuna.formatters.bytes_formatter import Template as T
+from fortuna.generator import sha_double_256
+from fortuna.tracer import trace_method
+
+
+class RawPool(bytearray):
+    """
+    Keeps the whole history of events. Easier to debug, but memory grows
+    until the next reseed, which hashes everything at once.
+    """
+
+    def double_digest(self) -> bytes:
+        return sha_double_256(self)
+
+
+class HashPool:
+    """
+    The book says "Implementations do not need to store the unbounded string,
+    but can compute the hash of the string incrementally as it is assembled in
+    the pool". Memory is constant and the hashing cost is paid by the entropy
+    sources instead of the reseed.
+    """
+
+    __slots__ = ("_hash", "_size")
+
+    def __init__(self):
+        self.clear()
+
+    def __iadd__(self, data: bytes):
+        self._hash.update(data)
+        self._size += len(data)
+        return self
+
+    def __len__(self):
+        return self._size
+
+    @trace_method(ret_fmt=T("0x{:25X}"), merge=True)
+    def double_digest(self) -> bytes:
+        return sha256(self._hash.digest()).digest()
+
+    def clear(self):
+        self._hash = sha256()
+        self._size = 0
@@ -0,0 +1,58 @@
+import threading
+from time import time
+
+from fortuna import Fortuna
+
+
+class ReseedScheduler:
+    """
+    Hashes the pools in a background thread, so requests don't pay for
+    `reseed_from_pools`. The next request only reseeds the generator with the
+    prepared seed. The minimum of 100 ms between reseeds is kept, since a
+    seed is only prepared when a reseed is due.
+    """
+
+    def __init__(self, fortuna: Fortuna, interval: float = 0.1):
+        if not fortuna.thread_safe:
+            raise ValueError(
+                "the scheduler runs in another thread, Fortuna must be thread safe"
+            )
+        self.fortuna = fortuna
+        self.interval = interval
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        assert not self.running
+        assert self.fortuna.reseed_scheduler is None, "already has a scheduler"
+        self.fortuna.reseed_scheduler = self
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="fortuna-reseed", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        if self.running:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            with self.fortuna._generator_lock:
+                # a seed not swapped in yet is still valid for the request path
+                if (seed := self.fortuna._pending_seed) is not None:
+                    self.fortuna._pending_seed = None
+                    self.fortuna.generator.reseed(seed)
+                    self.fortuna.last_seed = time()
+                self.fortuna.reseed_scheduler = None
+
+    def prepare(self) -> bool:
+        """prepare a seed if a reseed is due. Return whether it was prepared"""
+        return self.fortuna._prepare_seed()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.prepare()
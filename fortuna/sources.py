@@ -0,0 +1,166 @@
+import logging
+import os
+import select
+import threading
+import time
+
+LOG = logging.getLogger(__name__)
+
+
+class EntropySource:
+    """
+    Adds the events of one source rotating the 32 pools, so integrators don't
+    have to keep track of the next pool.
+
+    Events can be pushed with `add_event` or, if `interval` is not None,
+    collected by a background thread calling `collect` every `interval`
+    seconds once the source is started.
+    """
+
+    def __init__(self, source_id: int | None = None, interval: float | None = None):
+        assert source_id is None or 0 <= source_id <= 255
+        self.source_id = source_id  # assigned by the registry if None
+        self.interval = interval
+        self.pool = 0  # next pool
+        self.fortuna = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def __repr__(self):
+        return "%s(source_id=%r)" % (type(self).__name__, self.source_id)
+
+    def collect(self) -> bytes:
+        """return the data of one event, from 1 to 32 bytes. Empty to skip it"""
+        raise NotImplementedError(
+            "%r has no collect method, its events must be pushed with add_event" % self
+        )
+
+    def add_event(self, data: bytes):
+        self.fortuna.add_random_event(self.source_id, self.pool, data)
+        self.pool = (self.pool + 1) % 32
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        assert self.interval is not None, "only pushed events"
+        assert not self.running
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="fortuna-%r" % self, daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        """stop and release the resources of the source"""
+        self.stop()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                if data := self.collect():
+                    self.add_event(data)
+            except Exception:
+                # a failing device must not stop the collection for good
+                LOG.exception("entropy source %r failed", self)
+
+
+class TimestampSource(EntropySource):
+    """
+    Least significant bytes of a high resolution clock. The entropy comes from
+    the jitter of the thread scheduling.
+    """
+
+    def __init__(self, source_id=None, interval=0.01, nbytes=4):
+        super().__init__(source_id, interval)
+        self.nbytes = nbytes
+
+    def collect(self):
+        return (time.perf_counter_ns() % 2 ** (8 * self.nbytes)).to_bytes(
+            self.nbytes, "little"
+        )
+
+
+class FileDescriptorSource(EntropySource):
+    """
+    Reads events from a file descriptor or path, e.g. a hardware RNG or a
+    sensor device.
+    """
+
+    def __init__(
+        self, file: int | str | os.PathLike, source_id=None, interval=0.1, nbytes=32
+    ):
+        super().__init__(source_id, interval)
+        assert 1 <= nbytes <= 32
+        self.nbytes = nbytes
+        # only the descriptors opened here are closed
+        self._owns_fd = not isinstance(file, int)
+        self.fd = os.open(file, os.O_RDONLY) if self._owns_fd else file
+
+    def collect(self):
+        # a blocking read on a quiet device would never let `stop` join the thread
+        ready, _, _ = select.select([self.fd], [], [], self.interval)
+        if not ready:
+            return b""
+        return os.read(self.fd, self.nbytes)
+
+    def close(self):
+        super().close()
+        if self._owns_fd and self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class SourceRegistry:
+    """Sources of a `Fortuna` instance. Available as `Fortuna.sources`"""
+
+    def __init__(self, fortuna):
+        self.fortuna = fortuna
+        self._sources = {}
+
+    def register(self, source: EntropySource) -> EntropySource:
+        if source.source_id is None:
+            source.source_id = next(i for i in range(256) if i not in self._sources)
+        assert source.source_id not in self._sources, "source id already registered"
+        source.fortuna = self.fortuna
+        self._sources[source.source_id] = source
+        return source
+
+    def unregister(self, source: EntropySource):
+        source.close()
+        del self._sources[source.source_id]
+
+    def __getitem__(self, source_id: int) -> EntropySource:
+        return self._sources[source_id]
+
+    def __iter__(self):
+        return iter(list(self._sources.values()))
+
+    def __len__(self):
+        return len(self._sources)
+
+    def start(self):
+        """start the collector thread of every source with an interval"""
+        if not self.fortuna.thread_safe:
+            raise ValueError(
+                "sources run in other threads, Fortuna must be thread safe"
+            )
+        for source in self:
+            if source.interval is not None and not source.running:
+                source.start()
+
+    def stop(self):
+        for source in self:
+            source.stop()
+
+    def _after_fork_in_child(self):
+        # threads are not copied by fork
+        for source in self:
+            source._thread = None
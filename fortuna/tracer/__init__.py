@@ -1,11 +1,18 @@
 import contextlib
+import contextvars
 import functools
 import inspect
 import itertools
 import logging
+import os
+import time
 from abc import abstractmethod
+from collections import Counter
 from typing import Callable
 
+from fortuna.tracer.sink import Overflow, configure_async_sink  # noqa: F401
+from fortuna.tracer.timing import StatsCollector
+
 
 def format_args(args, kwargs):
     """
@@ -39,82 +46,310 @@ def get_name(fn):
 EXC = "-X"
 
 
-def trace_method(method=None, *, ret_fmt=None, merge=False):
+def get_binder(func):
+    """
+    Return a function mapping the call arguments of `func` to its parameter
+    names, with the defaults applied. The signature is only inspected here.
+
+    >>> bind = get_binder(lambda a, b=2, *, c=3: None)
+    >>> bind((1,), {"c": 4})
+    {'b': 2, 'c': 4, 'a': 1}
+    >>> bind = get_binder(lambda a, *args, **kwargs: None)
+    >>> bind((1, 2), {"c": 4})
+    {'a': 1, 'args': (2,), 'kwargs': {'c': 4}}
+    """
+    signature = inspect.signature(func)
+    parameters = signature.parameters.values()
+    if any(p.kind in (p.VAR_POSITIONAL, p.VAR_KEYWORD) for p in parameters):
+
+        def bind(args, kwargs):
+            bound = signature.bind_partial(*args, **kwargs)
+            bound.apply_defaults()
+            return bound.arguments
+
+        return bind
+
+    positional = [
+        p.name
+        for p in parameters
+        if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD)
+    ]
+    defaults = {p.name: p.default for p in parameters if p.default is not p.empty}
+
+    def bind(args, kwargs):
+        arguments = dict(defaults)
+        arguments.update(zip(positional, args))
+        arguments.update(kwargs)
+        return arguments
+
+    return bind
+
+
+# Read when decorating. If false, the decorators return the original function
+# (or property) and tracing has no cost at all. Set FORTUNA_TRACE=0 before
+# importing fortuna, or change it before importing the traced modules.
+ENABLED = os.environ.get("FORTUNA_TRACE", "1").lower() not in (
+    "0",
+    "false",
+    "no",
+    "off",
+)
+
+
+# Traces deeper than this are not logged but summarized, as "name ×count",
+# when the call at this depth ends. None for no limit
+MAX_DEPTH = (
+    int(os.environ["FORTUNA_TRACE_DEPTH"])
+    if "FORTUNA_TRACE_DEPTH" in os.environ
+    else None
+)
+
+
+def set_max_depth(depth: int | None):
+    global MAX_DEPTH
+    MAX_DEPTH = depth
+
+
+def trace_method(method=None, *, ret_fmt=None, merge=False, sample=1, rate_limit=None):
     if method is None:
-        return MethodTracer(args_fmt=None, ret_fmt=ret_fmt, merge=merge)
+        return MethodTracer(
+            args_fmt=None,
+            ret_fmt=ret_fmt,
+            merge=merge,
+            sample=sample,
+            rate_limit=rate_limit,
+        )
     else:
         return MethodTracer()(method)
 
 
-def trace_function(function=None, *, args_fmt=None, ret_fmt=None, merge=False):
+def trace_function(
+    function=None,
+    *,
+    args_fmt=None,
+    ret_fmt=None,
+    merge=False,
+    sample=1,
+    rate_limit=None,
+):
     if function is None:
-        return FunctionTracer(args_fmt=args_fmt, ret_fmt=ret_fmt, merge=merge)
+        return FunctionTracer(
+            args_fmt=args_fmt,
+            ret_fmt=ret_fmt,
+            merge=merge,
+            sample=sample,
+            rate_limit=rate_limit,
+        )
     else:
         return FunctionTracer()(function)
 
 
-# global var. This is not thread safe
-nesting = -1
+# Depth of the current traced call and id of the outermost one. Each thread
+# and asyncio task has its own values, so concurrent call trees don't mix
+nesting = contextvars.ContextVar("nesting", default=-1)
+trace_id = contextvars.ContextVar("trace_id", default=None)
+_trace_ids = itertools.count(1)
 INDENT_WIDTH = "    "
 
 
 def get_indent():
-    return nesting * INDENT_WIDTH
+    return nesting.get() * INDENT_WIDTH
+
+
+@contextlib.contextmanager
+def track_indent():
+    depth = nesting.get() + 1
+    token = nesting.set(depth)
+    # a new trace for each outermost call
+    id_token = trace_id.set(next(_trace_ids)) if depth == 0 else None
+    try:
+        yield depth * INDENT_WIDTH
+        # TODO: yield nesting-1? easier for properties?
+    finally:
+        nesting.reset(token)
+        if id_token is not None:
+            trace_id.reset(id_token)
+
+
+# Notified of every traced call and set, even if the loggers are disabled.
+# A collector has the methods:
+#   enter(tracer, method, args, kwargs, depth)
+#   exit(tracer, method, args, kwargs, depth, ret, exc)
+#   set(descriptor, value, depth, exc)
+collectors = []
+
+
+def install(collector):
+    collectors.append(collector)
+    return collector
+
+
+def uninstall(collector):
+    collectors.remove(collector)
+
 
+_stats = None
 
-def increment_indent():
-    global nesting
-    nesting += 1
 
+def enable_stats():
+    """time every traced call from now on, see `stats`"""
+    global _stats
+    if _stats is None:
+        _stats = install(StatsCollector())
+    return _stats
 
-def decrement_indent():
-    global nesting
-    nesting -= 1
+
+def disable_stats():
+    global _stats
+    if _stats is not None:
+        uninstall(_stats)
+        _stats = None
+
+
+def stats():
+    """snapshot of the timing of each traced function, by qualified name"""
+    return {} if _stats is None else _stats.snapshot()
+
+
+def print_stats(file=None):
+    if _stats is not None:
+        _stats.report(file)
+
+
+class Throttle:
+    """let 1 in `sample` traces through, and at most `rate_limit` per second"""
+
+    def __init__(self, sample=1, rate_limit=None):
+        self.sample = sample
+        self.rate_limit = rate_limit
+        self._calls = itertools.count()
+        self._second = 0
+        self._in_second = 0
+
+    def allow(self) -> bool:
+        if next(self._calls) % self.sample:
+            return False
+        if self.rate_limit is not None:
+            # no lock, concurrent threads may let a few more traces through
+            second = int(time.monotonic())
+            if second != self._second:
+                self._second, self._in_second = second, 0
+            if self._in_second >= self.rate_limit:
+                return False
+            self._in_second += 1
+        return True
+
+
+def new_throttle(sample, rate_limit):
+    return Throttle(sample, rate_limit) if sample > 1 or rate_limit else None
+
+
+# Names of the traces not logged below the current call, or None if they are
+_skipped = contextvars.ContextVar("skipped", default=None)
 
 
 @contextlib.contextmanager
-def track_indent():
-    increment_indent()
+def log_scope(name, logging_, throttle):
+    """
+    Yield None if the trace of `name` is not logged. Otherwise yield the count
+    of the traces skipped below it, by name, to log when it ends.
+
+    The traces below MAX_DEPTH are skipped, as well as all the ones below a
+    trace dropped by its throttle, so no orphan lines are logged.
+    """
+    skipped = _skipped.get()
+    if not logging_ or skipped is not None:
+        if logging_:
+            skipped[name] += 1
+        yield None
+        return
+    if throttle is not None and not throttle.allow():
+        summary, token = None, _skipped.set(Counter())
+    elif MAX_DEPTH is not None and nesting.get() >= MAX_DEPTH:
+        summary = Counter()
+        token = _skipped.set(summary)
+    else:
+        yield {}
+        return
     try:
-        yield get_indent()
-        # TODO: yield nesting-1? easier for properties?
+        yield summary
     finally:
-        decrement_indent()
+        _skipped.reset(token)
+
+
+def log_summary(logger, summary, indent):
+    for name, count in summary.items():
+        log(logger, "%s%s%s ×%d" % (indent, INDENT_WIDTH, name, count))
+
+
+def log(logger, msg):
+    """the trace id is attached to the record, to demultiplex concurrent traces"""
+    logger.debug(msg, extra={"trace_id": trace_id.get()})
 
 
 class FunctionTracer:
-    def __init__(self, args_fmt=None, ret_fmt=None, merge=False):
+    def __init__(
+        self, args_fmt=None, ret_fmt=None, merge=False, sample=1, rate_limit=None
+    ):
         self.merge = merge
         self.args_fmt = args_fmt
         self.ret_fmt = ret_fmt
+        self.throttle = new_throttle(sample, rate_limit)
+        self._bound = self._binder = None
 
     def __call__(self, method: Callable):
+        if not ENABLED:
+            return method
 
         logger = logging.getLogger(method.__qualname__ + ".tracer")
+        if self.args_fmt is not None:
+            # inspect the signature now, not when tracing
+            self._bound, self._binder = method, get_binder(method)
+
+        name = get_name(method)
 
         @functools.wraps(method)
         def wrapper(*args, **kwargs):
-            with track_indent() as indent:
-
-                if not self.merge:
-                    logger.debug(self.format_start(method, args, kwargs, indent))
+            logging_ = logger.isEnabledFor(logging.DEBUG)
+            if not (logging_ or collectors):
+                # nothing is formatted unless it is going to be logged
+                return method(*args, **kwargs)
+            with track_indent() as indent, log_scope(
+                name, logging_, self.throttle
+            ) as summary:
+                logging_ = summary is not None
+                depth = nesting.get()
+                for collector in collectors:
+                    collector.enter(self, method, args, kwargs, depth)
+
+                if logging_ and not self.merge:
+                    log(logger, self.format_start(method, args, kwargs, indent))
                 try:
                     ret = method(*args, **kwargs)
                 except Exception as exc:
-                    if self.merge:
-                        logger.debug(
+                    for collector in collectors:
+                        collector.exit(self, method, args, kwargs, depth, None, exc)
+                    if summary:
+                        log_summary(logger, summary, indent)
+                    if logging_ and self.merge:
+                        log(
+                            logger,
                             self.format_merged_exception(
                                 method, args, kwargs, exc, indent
-                            )
+                            ),
                         )
-                    else:
-                        logger.debug(self.format_exception(method, exc, indent))
+                    elif logging_:
+                        log(logger, self.format_exception(method, exc, indent))
                     raise
 
-                if self.merge:
-                    logger.debug(self.format_merged(method, args, kwargs, ret, indent))
-                else:
-                    logger.debug(self.format_end(method, ret, indent))
+                for collector in collectors:
+                    collector.exit(self, method, args, kwargs, depth, ret, None)
+                if summary:
+                    log_summary(logger, summary, indent)
+                if logging_ and self.merge:
+                    log(logger, self.format_merged(method, args, kwargs, ret, indent))
+                elif logging_:
+                    log(logger, self.format_end(method, ret, indent))
                 return ret
 
         return wrapper
@@ -150,12 +385,10 @@ class FunctionTracer:
         )
 
     def format_args(self, args, kwargs, func):
-        signature = inspect.signature(func)
         if self.args_fmt is not None:
-            # use bind_partial instead to delay error?
-            bind = signature.bind_partial(*args, **kwargs)
-            bind.apply_defaults()
-            return self.args_fmt.format(**bind.arguments)
+            # the tracer may also be used directly or for several functions
+            bind = self._binder if func is self._bound else get_binder(func)
+            return self.args_fmt.format(**bind(args, kwargs))
         is_bounded = hasattr(func, "__self__")
         if is_bounded:
             args = args[1:]
@@ -174,22 +407,42 @@ class MethodTracer(FunctionTracer):
 
 class TracedSetBase:
 
-    def __init__(self, value_fmt=None):
+    def __init__(self, value_fmt=None, sample=1, rate_limit=None):
         self.value_fmt = value_fmt
+        self.throttle = new_throttle(sample, rate_limit)
 
     def __set_name__(self, owner, name):
         self.name = name
         self.owner = owner
+        self.logger = logging.getLogger(self.qualname + ".tracer")
 
     def __set__(self, obj, value):
-        logger = logging.getLogger(self.qualname + ".tracer")
-        with track_indent() as indent:  # is uncommon property with child calls?
+        logger = self.logger
+        logging_ = logger.isEnabledFor(logging.DEBUG)
+        if not (logging_ or collectors):
+            self.setter(obj, value)
+            return
+        # is uncommon property with child calls?
+        with track_indent() as indent, log_scope(
+            self.qualname, logging_, self.throttle
+        ) as summary:
+            logging_ = summary is not None
             try:
                 self.setter(obj, value)
             except Exception as exc:
-                logger.debug(self.format_exception(value, exc, indent))
+                for collector in collectors:
+                    collector.set(self, value, nesting.get(), exc)
+                if summary:
+                    log_summary(logger, summary, indent)
+                if logging_:
+                    log(logger, self.format_exception(value, exc, indent))
                 raise
-            logger.debug(self.format_set(value, indent))
+            for collector in collectors:
+                collector.set(self, value, nesting.get(), None)
+            if summary:
+                log_summary(logger, summary, indent)
+            if logging_:
+                log(logger, self.format_set(value, indent))
 
     @abstractmethod
     def setter(self, obj, value): ...
@@ -220,12 +473,39 @@ class TracedSet(TracedSetBase):
         return getattr(obj, self.private_name)
 
     def __delete__(self, obj):
-        del self.private_name
+        delattr(obj, self.private_name)
 
     def setter(self, obj, value):
         setattr(obj, self.private_name, value)
 
 
+def traced_slots(cls):
+    """
+    Class decorator that rebuilds `cls` with ``__slots__``: the ones declared
+    in the class plus the storage of its `TracedSet` attributes. If tracing is
+    disabled, the `TracedSet` descriptors are dropped and become plain slots,
+    so reading and writing them has no overhead.
+
+    The class is created again, so methods must not use ``super()`` without
+    arguments.
+    """
+    namespace = dict(cls.__dict__)
+    slots = list(namespace.pop("__slots__", ()))
+    for name in slots:
+        namespace.pop(name, None)  # member descriptors of the first class
+    namespace.pop("__dict__", None)
+    namespace.pop("__weakref__", None)
+    for name, attr in cls.__dict__.items():
+        if isinstance(attr, TracedSet):
+            if ENABLED:
+                slots.append(attr.private_name)
+            else:
+                del namespace[name]
+                slots.append(name)
+    namespace["__slots__"] = tuple(slots)
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+
 class TracedSetWrapped(TracedSetBase):
     def __init__(self, *args, inner_descriptor, **kwargs):
         self.inner_descriptor = inner_descriptor
@@ -246,8 +526,15 @@ class TracedSetWrapped(TracedSetBase):
         self.inner_descriptor.__set__(obj, value)
 
 
-def trace_property(prop=None, *, value_fmt=None):
+def trace_property(prop=None, *, value_fmt=None, sample=1, rate_limit=None):
+    if not ENABLED:
+        return (lambda prop: prop) if prop is None else prop
     if prop is None:
-        return lambda prop: TracedSetWrapped(inner_descriptor=prop, value_fmt=value_fmt)
+        return lambda prop: TracedSetWrapped(
+            inner_descriptor=prop,
+            value_fmt=value_fmt,
+            sample=sample,
+            rate_limit=rate_limit,
+        )
     else:
         return TracedSetWrapped(inner_descriptor=prop)
@@ -0,0 +1,89 @@
+import json
+import os
+import threading
+from collections import deque
+from time import perf_counter_ns
+
+from fortuna.tracer import get_name, install, uninstall
+
+
+class ChromeTraceExporter:
+    """
+    Collector (see `fortuna.tracer.install`) of Chrome trace events: a begin
+    and an end event for each traced call and an instant event for each
+    traced set. The file written by `save` can be opened in a flame chart
+    viewer like https://ui.perfetto.dev or chrome://tracing.
+
+    Arguments are formatted when the event happens, because some of them
+    (e.g. the key) are wiped afterwards. That has a cost, so capture only
+    between `start` and `stop`. Only the last `maxlen` events are kept.
+    """
+
+    def __init__(self, maxlen: int = 100_000):
+        self.events = deque(maxlen=maxlen)
+        self._pid = os.getpid()
+        self._threads = {}
+
+    def start(self):
+        install(self)
+        return self
+
+    def stop(self):
+        uninstall(self)
+
+    def _event(self, ph, name, args):
+        thread = threading.current_thread()
+        tid = thread.native_id
+        if tid not in self._threads:
+            self._threads[tid] = thread.name
+        event = {
+            "name": name,
+            "ph": ph,
+            "ts": perf_counter_ns() / 1000,
+            "pid": self._pid,
+            "tid": tid,
+            "args": args,
+        }
+        if ph == "i":
+            event["s"] = "t"
+        self.events.append(event)
+
+    def enter(self, tracer, method, args, kwargs, depth):
+        self._event(
+            "B", get_name(method), {"args": tracer.format_args(args, kwargs, method)}
+        )
+
+    def exit(self, tracer, method, args, kwargs, depth, ret, exc):
+        if exc is not None:
+            self._event("E", get_name(method), {"exception": repr(exc)})
+        else:
+            self._event("E", get_name(method), {"return": tracer.format_ret(ret)})
+
+    def set(self, descriptor, value, depth, exc):
+        if exc is not None:
+            args = {"value": repr(value), "exception": repr(exc)}
+        else:
+            args = {"value": descriptor.format_value(value)}
+        self._event("i", descriptor.qualname, args)
+
+    def clear(self):
+        self.events.clear()
+        self._threads.clear()
+
+    def trace(self) -> dict:
+        """the events plus the names of the threads, in the JSON object format"""
+        names = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": self._pid,
+                "tid": tid,
+                "args": {"name": name},
+            }
+            for tid, name in list(self._threads.items())
+        ]
+        return {"traceEvents": names + list(self.events), "displayTimeUnit": "ns"}
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.trace(), f)
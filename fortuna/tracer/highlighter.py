@@ -1,5 +1,8 @@
-from rich.highlighter import RegexHighlighter
+import re
+
+from rich.highlighter import Highlighter, RegexHighlighter
 from rich.style import Style
+from rich.text import Span, Text
 from rich.theme import Theme
 
 
@@ -18,7 +21,7 @@ class ReprHighlighter(RegexHighlighter):
         r"\b(?P<bool_true>True)\b|\b(?P<bool_false>False)\b|\b(?P<none>None)\b",
         r"(^|\s)(?P<ret_arrow>->)[\s$]",
         r"(^|\s)(?P<ret_exc>-X)\s(?P<exc>\w+)?",
-        # TODO: use _combine_regex as superclass?
+        # combined in TraceHighlighter
     ]
 
 
@@ -29,3 +32,55 @@ theme = Theme(
         "repr.exc": Style(color="bright_red", bold=True),
     }
 )
+
+
+# The tokens of the trace lines, in order of precedence. Unlike the regexes of
+# ReprHighlighter, they are tried at each position in a single pass, so the
+# text inside a string or a hex number is not searched again.
+TOKENS = [
+    r"(?P<str>b?'[^'\\]*(?:\\.[^'\\]*)*'|b?\"[^\"\\]*(?:\\.[^\"\\]*)*\")",
+    r"(?P<number>0x[a-fA-F0-9]*(?:<\.*[+=] *\d+ *\.*>)?[a-fA-F0-9]*)",
+    r"(?:^|(?<=\s))(?P<ret_arrow>->)(?=\s|$)",
+    r"(?:^|(?<=\s))(?P<ret_exc>-X)\s(?P<exc>\w+)?",
+    r"(?P<call>[\w.]+)(?P<call_brace>\()",
+    r"(?P<attrib_name>[\w.]{1,50})=(?:(?P<attrib_value>(?!0x|True\b|False\b|None\b)\w+)\b(?![.(]))?",
+    r"\b(?:(?P<bool_true>True)|(?P<bool_false>False)|(?P<none>None))\b",
+    r"(?P<brace>[][{}()])",
+]
+STYLES = {"call_brace": "brace"}
+PATTERN = re.compile("|".join(TOKENS))
+
+
+def group_styles(base_style):
+    """for each group, the groups of its alternative and their styles"""
+    alternatives = {}
+    for token in TOKENS:
+        names = list(re.compile(token).groupindex)
+        groups = [
+            (PATTERN.groupindex[name], base_style + STYLES.get(name, name))
+            for name in names
+        ]
+        for name in names:
+            alternatives[name] = groups
+    return alternatives
+
+
+class TraceHighlighter(Highlighter):
+    """
+    Same styles as `ReprHighlighter` for the trace lines, with one combined
+    regex. Other reprs (e.g. tags) are not highlighted.
+    """
+
+    base_style = "repr."
+
+    def __init__(self):
+        self.alternatives = group_styles(self.base_style)
+
+    def highlight(self, text: Text):
+        append = text.spans.append
+        alternatives = self.alternatives
+        for match in PATTERN.finditer(text.plain):
+            for index, style in alternatives[match.lastgroup]:
+                start, end = match.span(index)
+                if start != end:
+                    append(Span(start, end, style))
@@ -0,0 +1,137 @@
+import contextlib
+import itertools
+import reprlib
+import sys
+from time import perf_counter_ns
+
+from fortuna.formatters.bytes_formatter import BytesSnapshot
+from fortuna.tracer import INDENT_WIDTH, FunctionTracer, trace_id
+
+START, END, EXC, MERGED, MERGED_EXC, SET, SET_EXC = range(7)
+
+SCALARS = (int, float, complex, str, type(None))
+
+
+class _Repr(str):
+    """a repr taken at record time, rendered as is"""
+
+    __repr__ = str.__str__
+
+
+def snapshot(value):
+    """
+    What a record keeps of a value: immutable scalars as they are, the edges
+    of bytes-like values and a short repr of anything else. Records never pin
+    a buffer and their size does not depend on the size of the data.
+
+    >>> snapshot(3), snapshot(bytearray(64)), snapshot([b"a"] * 100)
+    (3, <bytearray of 64 bytes>, [b'a', b'a', b'a', b'a', b'a', b'a', ...])
+    """
+    if isinstance(value, SCALARS):
+        return value
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        try:
+            return BytesSnapshot(value)
+        except ValueError:  # released memoryview
+            pass
+    return _Repr(reprlib.repr(value))
+
+
+class FlightRecorder:
+    """
+    Collector (see `fortuna.tracer.install`) that appends compact records to a
+    preallocated ring buffer, keeping the last `capacity` ones. Nothing is
+    formatted until the records are rendered, so it can be always on.
+
+    Only a `snapshot` of the arguments, return values and exceptions is kept.
+    Templates reading attributes of other objects (e.g. ``self.key``) can't be
+    rendered later, so those calls are rendered with the default format.
+    """
+
+    def __init__(self, capacity: int = 4096):
+        self.capacity = capacity
+        self._records = [None] * capacity
+        self._seq = itertools.count()  # next() is atomic, no lock needed
+
+    def _append(self, kind, depth, tracer, method, args, kwargs, result):
+        seq = next(self._seq)
+        self._records[seq % self.capacity] = (
+            seq,
+            perf_counter_ns(),
+            trace_id.get(),
+            depth,
+            kind,
+            tracer,
+            method,
+            tuple([snapshot(arg) for arg in args]),
+            {name: snapshot(value) for name, value in kwargs.items()},
+            snapshot(result),
+        )
+
+    def enter(self, tracer, method, args, kwargs, depth):
+        if not tracer.merge:
+            self._append(START, depth, tracer, method, args, kwargs, None)
+
+    def exit(self, tracer, method, args, kwargs, depth, ret, exc):
+        if exc is not None:
+            kind, result = (MERGED_EXC if tracer.merge else EXC), exc
+        else:
+            kind, result = (MERGED if tracer.merge else END), ret
+        self._append(kind, depth, tracer, method, args, kwargs, result)
+
+    def set(self, descriptor, value, depth, exc):
+        if exc is None:
+            self._append(SET, depth, descriptor, None, (value,), {}, None)
+        else:
+            self._append(SET_EXC, depth, descriptor, None, (value,), {}, exc)
+
+    def records(self):
+        """the records in the buffer, oldest first"""
+        return sorted(r for r in list(self._records) if r is not None)
+
+    def clear(self):
+        self._records = [None] * self.capacity
+
+    def render(self) -> list[str]:
+        """format the records like the traces of the loggers"""
+        return [render_record(record) for record in self.records()]
+
+    def dump(self, file=None):
+        file = sys.stderr if file is None else file
+        for line in self.render():
+            print(line, file=file)
+
+    @contextlib.contextmanager
+    def dump_on_error(self, file=None):
+        try:
+            yield self
+        except Exception:
+            self.dump(file)
+            raise
+
+
+def render_record(record) -> str:
+    _, _, _, depth, kind, tracer, method, args, kwargs, result = record
+    indent = depth * INDENT_WIDTH
+    if kind == SET:
+        return tracer.format_set(args[0], indent)
+    elif kind == SET_EXC:
+        return tracer.format_exception(args[0], result, indent)
+    try:
+        return _render_call(tracer, kind, method, args, kwargs, result, indent)
+    except (AttributeError, KeyError, IndexError, TypeError, ValueError):
+        # a template reading something that was not kept in the snapshot
+        default = type(tracer)(ret_fmt=tracer.ret_fmt, merge=tracer.merge)
+        return _render_call(default, kind, method, args, kwargs, result, indent)
+
+
+def _render_call(tracer: FunctionTracer, kind, method, args, kwargs, result, indent):
+    if kind == START:
+        return tracer.format_start(method, args, kwargs, indent)
+    elif kind == END:
+        return tracer.format_end(method, result, indent)
+    elif kind == EXC:
+        return tracer.format_exception(method, result, indent)
+    elif kind == MERGED:
+        return tracer.format_merged(method, args, kwargs, result, indent)
+    return tracer.format_merged_exception(method, args, kwargs, result, indent)
@@ -0,0 +1,80 @@
+import copy
+import logging
+import queue
+from enum import StrEnum, auto
+from logging.handlers import QueueHandler, QueueListener
+
+
+class Overflow(StrEnum):
+    BLOCK = auto()  # wait for the listener, nothing is lost
+    DROP = auto()  # drop the new record
+    DROP_OLDEST = auto()  # drop the oldest queued record, keep the latest ones
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Handler that only queues the records, to be rendered by the handlers of
+    its `listener` in a background thread. Records dropped because the queue
+    is full are counted in `dropped`.
+    """
+
+    def __init__(self, maxsize=10_000, overflow=Overflow.DROP_OLDEST):
+        super().__init__(queue.Queue(maxsize))
+        self.overflow = Overflow(overflow)
+        self.dropped = 0
+        self.listener = None
+
+    def prepare(self, record):
+        # The message is merged now, since the arguments may change later.
+        # Unlike QueueHandler, exc_info is kept for the rich tracebacks
+        record = copy.copy(record)
+        record.message = record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        if self.overflow == Overflow.BLOCK:
+            self.queue.put(record)
+            return
+        while True:
+            try:
+                self.queue.put_nowait(record)
+                return
+            except queue.Full:
+                if self.overflow == Overflow.DROP:
+                    self.dropped += 1
+                    return
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+            except queue.Empty:
+                pass
+
+    def close(self):
+        # called by logging.shutdown at exit: render the queued records first
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        super().close()
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        # the queue may be full, wait for room instead of raising queue.Full
+        self.queue.put(self._sentinel)
+
+
+def configure_async_sink(
+    *handlers, logger=None, maxsize=10_000, overflow=Overflow.DROP_OLDEST
+):
+    """
+    Route the records of `logger` (the root one by default, so every tracer
+    logger) through a bounded queue to `handlers`, which run in a background
+    thread. Formatting and I/O of the traces are then off the generator hot
+    path. Return the queue handler; closing it renders the pending records.
+    """
+    handler = BoundedQueueHandler(maxsize, overflow)
+    handler.listener = _Listener(handler.queue, *handlers, respect_handler_level=True)
+    handler.listener.start()
+    logging.getLogger(logger).addHandler(handler)
+    return handler
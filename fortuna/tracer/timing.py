@@ -0,0 +1,140 @@
+import contextvars
+import sys
+from collections import Counter, namedtuple
+from time import perf_counter_ns
+
+Stats = namedtuple("Stats", "calls total_ns self_ns p50_ns p99_ns max_ns")
+
+
+def bucket(ns: int) -> int:
+    """
+    Logarithmic histogram bucket with 4 sub-buckets per power of two, so the
+    error of the percentiles is below 25%
+
+    >>> [bucket(ns) for ns in (0, 3, 4, 7, 8, 9, 10, 15, 16)]
+    [0, 3, 4, 7, 8, 8, 9, 11, 12]
+    """
+    shift = max(ns.bit_length() - 3, 0)
+    return shift * 4 + (ns >> shift)
+
+
+def bucket_limit(index: int) -> int:
+    """
+    highest value of a bucket
+
+    >>> [bucket_limit(bucket(ns)) for ns in (3, 9, 15, 1000)]
+    [3, 9, 15, 1023]
+    """
+    if index < 8:
+        return index
+    shift, mantissa = divmod(index, 4)
+    shift -= 1
+    return ((mantissa + 5) << shift) - 1
+
+
+class FunctionStats:
+    __slots__ = ("calls", "total_ns", "self_ns", "max_ns", "histogram")
+
+    def __init__(self):
+        self.calls = self.total_ns = self.self_ns = self.max_ns = 0
+        self.histogram = Counter()
+
+    def add(self, elapsed, self_elapsed):
+        self.calls += 1
+        self.total_ns += elapsed
+        self.self_ns += self_elapsed
+        if elapsed > self.max_ns:
+            self.max_ns = elapsed
+        self.histogram[bucket(elapsed)] += 1
+
+    def percentile(self, q: float) -> int:
+        target = q * self.calls
+        seen = 0
+        for index in sorted(self.histogram):
+            seen += self.histogram[index]
+            if seen >= target:
+                return min(bucket_limit(index), self.max_ns)
+        return self.max_ns
+
+    def snapshot(self) -> Stats:
+        return Stats(
+            self.calls,
+            self.total_ns,
+            self.self_ns,
+            self.percentile(0.5),
+            self.percentile(0.99),
+            self.max_ns,
+        )
+
+
+class StatsCollector:
+    """
+    Collector (see `fortuna.tracer.install`) of the call count, total and self
+    time and latency histogram of every traced function. Self time excludes
+    the time of traced children.
+    """
+
+    def __init__(self):
+        self.functions = {}
+        # [start, time of the children, token] of the current traced call. Per
+        # collector, so the frames left by a disabled one are ignored
+        self._frame = contextvars.ContextVar("stats_frame", default=None)
+
+    def enter(self, tracer, method, args, kwargs, depth):
+        frame = [perf_counter_ns(), 0, None]
+        frame[2] = self._frame.set(frame)
+
+    def exit(self, tracer, method, args, kwargs, depth, ret, exc):
+        end = perf_counter_ns()
+        frame = self._frame.get()
+        if frame is None:
+            return  # enabled during the call, its start was not timed
+        self._frame.reset(frame[2])
+        elapsed = end - frame[0]
+        if (parent := self._frame.get()) is not None:
+            parent[1] += elapsed
+        name = method.__qualname__
+        if (function := self.functions.get(name)) is None:
+            function = self.functions.setdefault(name, FunctionStats())
+        # children of other asyncio tasks may be counted, don't go negative
+        function.add(elapsed, max(elapsed - frame[1], 0))
+
+    def set(self, descriptor, value, depth, exc):
+        pass
+
+    def snapshot(self) -> dict[str, Stats]:
+        return {name: f.snapshot() for name, f in list(self.functions.items())}
+
+    def report(self, file=None):
+        file = sys.stdout if file is None else file
+        stats = sorted(self.snapshot().items(), key=lambda item: -item[1].self_ns)
+        width = max((len(name) for name, _ in stats), default=8)
+        print(
+            "%-*s %8s %12s %12s %10s %10s %10s"
+            % (
+                width,
+                "function",
+                "calls",
+                "total ms",
+                "self ms",
+                "p50 us",
+                "p99 us",
+                "max us",
+            ),
+            file=file,
+        )
+        for name, s in stats:
+            print(
+                "%-*s %8d %12.3f %12.3f %10.1f %10.1f %10.1f"
+                % (
+                    width,
+                    name,
+                    s.calls,
+                    s.total_ns / 1e6,
+                    s.self_ns / 1e6,
+                    s.p50_ns / 1e3,
+                    s.p99_ns / 1e3,
+                    s.max_ns / 1e3,
+                ),
+                file=file,
+            )
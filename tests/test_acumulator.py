@@ -1,3 +1,5 @@
+import array
+
 import pytest
 from fortuna import Fortuna
 from fortuna.generator import FortunaNotSeeded
@@ -74,3 +76,90 @@ def test():
         == fa.generator.key.hex()
     )
     assert fa.generator.counter == 5
+
+
+def test_random_into():
+    fa = Fortuna()
+    for p in range(32):
+        fa.add_random_event(42, p, b"X" * 32)
+        fa.add_random_event(42, p, b"X" * 32)
+
+    buffer = array.array("Q", bytes(32))
+    fa.random_into(buffer)
+    assert (
+        "b7b86bd9a27d96d7bb4add1b6b10d157" "2350b1c61253db2f8da233be726dc15f"
+    ) == buffer.tobytes().hex()
+    assert fa.generator.counter == 5
+
+
+def test_stream():
+    fa = Fortuna()
+    fa.generator.reseed(b"Hello")
+
+    chunks = list(fa.stream(100, chunk_size=32))
+    assert [len(c) for c in chunks] == [32, 32, 32, 4]
+    # 2 + 2 + 2 + 1 blocks of output plus 2 blocks of rekey after each chunk
+    assert fa.generator.counter == 1 + 7 + 4 * 2
+
+    stream = fa.stream(chunk_size=16)
+    assert all(len(next(stream)) == 16 for i in range(10))
+
+
+def test_random_many():
+    fa = Fortuna()
+    fa.generator.reseed(b"Hello")
+    fa2 = Fortuna()
+    fa2.generator.reseed(b"Hello")
+
+    res = fa.random_many([8, 0, 3, 21])
+    assert [len(r) for r in res] == [8, 0, 3, 21]
+    assert b"".join(res) == fa2.random_data(32)
+    assert fa.generator.counter == fa2.generator.counter
+
+
+def test_hash_pools():
+    fa, fa_hash = Fortuna(), Fortuna(hash_pools=True)
+    for p in range(32):
+        for f in (fa, fa_hash):
+            f.add_random_event(42, p, b"X" * 32)
+            f.add_random_event(42, p, b"X" * 32)
+    assert len(fa_hash.pools[0]) == len(fa.pools[0]) == (32 + 2) * 2
+
+    assert fa_hash.random_data(32) == fa.random_data(32)
+    assert fa_hash.generator.key == fa.generator.key
+    assert len(fa_hash.pools[0]) == 0
+
+
+@pytest.mark.parametrize(
+    "events, width",
+    [
+        ([b"a", b"bc", b"X" * 32] * 30, None),
+        (bytes(range(200)) * 4, 8),
+        (array.array("I", range(1000)), None),
+    ],
+)
+def test_add_random_events(events, width):
+    fa, expected = Fortuna(), Fortuna()
+    fa.add_random_events(7, events, width=width)
+    fa.add_random_events(7, events, width=width)
+
+    if width is None and not isinstance(events, list):
+        width = events.itemsize
+    if width is not None:
+        data = bytes(events)
+        events = [data[i : i + width] for i in range(0, len(data), width)]
+    pool = 0
+    for data in events * 2:
+        expected.add_random_event(7, pool, data)
+        pool = (pool + 1) % 32
+    assert fa.pools == expected.pools
+
+
+def test_add_random_events_pools():
+    fa = Fortuna()
+    fa.add_random_events(7, [b"a", b"b", b"c"], pools=[3, 5])
+    assert fa.pools[3] == b"\x07\x01a\x07\x01c"
+    assert fa.pools[5] == b"\x07\x01b"
+    # explicit pools don't move the rotation
+    fa.add_random_events(7, [b"d"])
+    assert fa.pools[0] == b"\x07\x01d"
@@ -0,0 +1,90 @@
+import asyncio
+import threading
+
+import pytest
+
+from fortuna import Fortuna
+from fortuna.aio import AsyncFortuna
+
+
+def test_random_data():
+    async def main():
+        f = AsyncFortuna(threshold=32)
+        f.fortuna.generator.reseed(b"Hello")
+        small = await f.random_data(16)
+        big = await f.random_data(2**16)  # generated in the executor
+        return small, big
+
+    small, big = asyncio.run(main())
+    assert len(small) == 16
+    assert len(big) == 2**16
+
+
+def test_not_thread_safe():
+    with pytest.raises(ValueError):
+        AsyncFortuna(Fortuna())
+
+
+def test_source():
+    async def collect():
+        return b"\x01" * 32
+
+    async def main():
+        f = AsyncFortuna()
+        f.add_source(3, collect, interval=0.001)
+        while len(f.fortuna.pools[1]) == 0:
+            await asyncio.sleep(0.001)
+        await f.aclose()
+        return f.fortuna
+
+    fortuna = asyncio.run(main())
+    assert fortuna.pools[0][:2] == bytes([3, 32])
+    assert fortuna.pools[1][:2] == bytes([3, 32])
+
+
+def test_small_request_while_generator_busy():
+    async def main():
+        f = AsyncFortuna()
+        f.fortuna.generator.reseed(b"Hello")
+        # as if an executor thread was generating a big request
+        acquired = threading.Event()
+        release = threading.Event()
+
+        def hold_lock():
+            with f.fortuna._generator_lock:
+                acquired.set()
+                release.wait()
+
+        holder = threading.Thread(target=hold_lock)
+        holder.start()
+        acquired.wait()
+        request = asyncio.create_task(f.random_data(16))
+        await asyncio.sleep(0.01)
+        # the loop is still responsive, the request waits in the executor
+        assert not request.done()
+        release.set()
+        data = await request
+        holder.join()
+        return data
+
+    assert len(asyncio.run(main())) == 16
+
+
+def test_failing_source(caplog):
+    calls = []
+
+    def collect():
+        calls.append(None)
+        if len(calls) == 1:
+            raise OSError("device not ready")
+        return b"\x01"
+
+    async def main():
+        f = AsyncFortuna()
+        f.add_source(3, collect, interval=0.001)
+        while len(f.fortuna.pools[0]) == 0:
+            await asyncio.sleep(0.001)
+        await f.aclose()
+
+    asyncio.run(main())
+    assert "entropy source 3 failed" in caplog.text
@@ -0,0 +1,70 @@
+import json
+import threading
+
+import pytest
+
+from fortuna.tracer import install, uninstall
+from fortuna.tracer.chrome import ChromeTraceExporter
+
+from test_tracer import A
+
+
+@pytest.fixture
+def exporter():
+    exporter = install(ChromeTraceExporter())
+    yield exporter
+    uninstall(exporter)
+
+
+def test_events(exporter):
+    a = A()
+    a.level1(2, 3)
+    a.my_attr = 4
+    assert [(e["ph"], e["name"]) for e in exporter.events] == [
+        ("B", "A.level1"),
+        ("B", "A.level3"),
+        ("E", "A.level3"),
+        ("B", "A.level2_interesting"),
+        ("E", "A.level2_interesting"),
+        ("E", "A.level1"),
+        ("i", "A.my_attr"),
+    ]
+    assert exporter.events[0]["args"] == {"args": "2, 3"}
+    assert exporter.events[5]["args"] == {"return": "9"}
+    assert exporter.events[-1]["args"] == {"value": "4"}
+    timestamps = [e["ts"] for e in exporter.events]
+    assert timestamps == sorted(timestamps)
+
+
+def test_exception(exporter):
+    a = A()
+    with pytest.raises(ValueError):
+        a.my_attr2 = 10
+    (event,) = exporter.events
+    assert event["args"]["exception"] == "ValueError('should be less than 10')"
+
+
+def test_save(exporter, tmp_path):
+    thread = threading.Thread(target=A().level1, args=(1, 1), name="worker")
+    thread.start()
+    thread.join()
+    path = tmp_path / "trace.json"
+    exporter.save(path)
+    trace = json.loads(path.read_text())
+    names = [e for e in trace["traceEvents"] if e["ph"] == "M"]
+    assert [e["args"]["name"] for e in names] == ["worker"]
+    assert {e["tid"] for e in trace["traceEvents"]} == {thread.native_id}
+
+
+def test_bounded_capture():
+    exporter = ChromeTraceExporter(maxlen=4).start()
+    a = A()
+    a.level1(2, 3)
+    exporter.stop()
+    a.level1(2, 3)
+    assert [(e["ph"], e["name"]) for e in exporter.events] == [
+        ("E", "A.level3"),
+        ("B", "A.level2_interesting"),
+        ("E", "A.level2_interesting"),
+        ("E", "A.level1"),
+    ]
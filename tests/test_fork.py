@@ -0,0 +1,41 @@
+import io
+import os
+
+import pytest
+
+from fortuna import Fortuna
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+
+
+def random_data_in_child(fortuna, nbytes=32):
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.write(write, fortuna.random_data(nbytes))
+            os.write(write, b"1" if fortuna.seed_file is None else b"0")
+        finally:
+            os._exit(0)
+    os.close(write)
+    with os.fdopen(read, "rb") as f:
+        data = f.read()
+    os.waitpid(pid, 0)
+    return data[:nbytes], data[nbytes:] == b"1"
+
+
+def test_child_diverges():
+    fortuna = Fortuna(thread_safe=True)
+    fortuna.generator.reseed(b"Hello")
+
+    child1, _ = random_data_in_child(fortuna)
+    child2, _ = random_data_in_child(fortuna)
+    parent = fortuna.random_data(32)
+    assert len({child1, child2, bytes(parent)}) == 3
+
+
+def test_prefork():
+    fortuna = Fortuna(seed_file=io.BytesIO(b"\x00" * 64), prefork=True)
+    _, seed_file_dropped = random_data_in_child(fortuna)
+    assert seed_file_dropped
+    assert fortuna.seed_file is not None
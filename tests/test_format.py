@@ -1,3 +1,4 @@
+import pytest
 from fortuna.formatters.pools import *
 from fortuna.formatters.bytes_formatter import *
 
@@ -70,6 +71,15 @@ def test_pools_empty():
     )
 
 
+def test_hash_pools():
+    from fortuna import Fortuna
+
+    fortuna = Fortuna(hash_pools=True)
+    fortuna.add_random_event(0, 1, b"\x01\x02")
+    res = format_pools(fortuna.pools[:2], width=17)
+    assert res == "0: 0x<=0...>     \n1: 0x<=4...>     \n"
+
+
 def test_bytes_template():
     template = Template("0x{:X}")
     assert "0x12AB" == template.format(b"\x12\xab")
@@ -107,3 +117,40 @@ def test_regex():
     assert m.group("align") == "<"
     assert m.group("width") == "50"
     assert m.group("alternate") == "#"
+
+
+@pytest.mark.parametrize("trim", ["left", "center", "right"])
+@pytest.mark.parametrize("width", [8, 9, 18, 19, 40])
+def test_overflow_bytes(trim, width):
+    """same output with raw bytes than with hexadecimal"""
+    for data in (b"", b"\x01", bytes(range(5)), bytes(range(256)) * 4):
+        hexa = data.hex().upper()
+        for print_total in (True, False):
+            try:
+                expected = format_overflow(hexa, width, trim, print_total)
+            except ValueError:
+                with pytest.raises(ValueError):
+                    format_overflow(data, width, trim, print_total)
+            else:
+                assert format_overflow(data, width, trim, print_total) == expected
+
+
+@pytest.mark.parametrize(
+    "template, args, kwargs",
+    [
+        ("0x{:X}", (b"\x12\xab",), {}),
+        ("0x{:^25X} {:>#20X}", (bytes(100), bytes(range(50))), {}),
+        ("key=0x{self.key:25X}, {plaintext!r:>10}", (), {"plaintext": b"ab"}),
+        ("{0} {0:X} {1[1]}", (255, [1, 2]), {}),
+        ("{:{width}}", (3,), {"width": 5}),  # nested fields are not compiled
+        ("{{literal}}", (), {}),
+    ],
+)
+def test_compiled_template(template, args, kwargs):
+    class Obj:
+        key = bytes(range(32))
+
+    kwargs = {"self": Obj(), **kwargs}
+    assert Template(template).format(*args, **kwargs) == Formatter().format(
+        template, *args, **kwargs
+    )
@@ -1,4 +1,4 @@
-from fortuna.generator import Generator, FortunaNotSeeded
+from fortuna.generator import Generator, FortunaNotSeeded, encrypt
 import pytest
 
 
@@ -28,3 +28,56 @@ def test():
         "e6b71ff9f37112d0c193a135160862b7"  # counter=4
     )
     assert g.counter == 5
+
+
+def test_generate_blocks_bulk():
+    """a single cipher call over the counter range gives the same blocks as one call per block"""
+    g = Generator()
+    g.reseed(b"Hello")
+    key, counter = g.key, g.counter
+
+    expected = b"".join(encrypt(key, c) for c in range(counter, counter + 100))
+    assert g.generate_blocks(100) == expected
+    assert g.counter == counter + 100
+
+
+def test_encryptor_cache():
+    g = Generator()
+    g.reseed(b"Hello")
+    g.generate_blocks(1)
+    encryptor = g._encryptor
+    g.generate_blocks(1)
+    assert g._encryptor is encryptor
+
+    old_key = g.key
+    internal_key = g._key
+    g.pseudo_randomdata(16)  # rekey evicts the encryptor and wipes the old key
+    assert g._encryptor is None
+    assert internal_key == b"\x00" * 32
+    assert old_key != b"\x00" * 32  # the key read by the caller is not wiped
+    assert g.key not in (old_key, b"\x00" * 32)
+
+
+@pytest.mark.parametrize(
+    "nbytes", [0, 1, 16, 33, 2**16 - 1, 2**16, 2**16 + 5, 2**16 + 16, 2**20]
+)
+def test_generate_into(nbytes):
+    g = Generator()
+    g.reseed(b"Hello")
+    key, counter = g.key, g.counter
+
+    blocks = -(-nbytes // 16)
+    expected = b"".join(encrypt(key, c) for c in range(counter, counter + blocks + 2))
+
+    buffer = bytearray(nbytes)
+    g.generate_into(memoryview(buffer))
+    assert buffer == expected[:nbytes]
+    assert g.key == expected[blocks * 16 :]  # rekeyed with the next two blocks
+    assert g.counter == counter + blocks + 2
+
+
+def test_generate_into_readonly():
+    g = Generator()
+    g.reseed(b"Hello")
+    with pytest.raises(TypeError):
+        g.generate_into(memoryview(b"\x00" * 16))
@@ -0,0 +1,52 @@
+import pytest
+from rich.text import Text
+
+from fortuna.tracer.highlighter import TraceHighlighter
+
+
+def styles(line):
+    text = TraceHighlighter()(Text(line))
+    return [(line[span.start : span.end], span.style) for span in text.spans]
+
+
+@pytest.mark.parametrize(
+    "line, expected",
+    [
+        (
+            "Generator.reseed(seed=0x<+ 5...>3536) -> None",
+            [
+                ("Generator.reseed", "repr.call"),
+                ("(", "repr.brace"),
+                ("seed", "repr.attrib_name"),
+                ("0x<+ 5...>3536", "repr.number"),
+                (")", "repr.brace"),
+                ("->", "repr.ret_arrow"),
+                ("None", "repr.none"),
+            ],
+        ),
+        (
+            "    -X ValueError('a(b) -> True')",
+            [
+                ("-X", "repr.ret_exc"),
+                ("ValueError", "repr.exc"),
+                ("(", "repr.brace"),
+                ("'a(b) -> True'", "repr.str"),
+                (")", "repr.brace"),
+            ],
+        ),
+        (
+            "Fortuna.random_data(nbytes=4, flag=False) ...",
+            [
+                ("Fortuna.random_data", "repr.call"),
+                ("(", "repr.brace"),
+                ("nbytes", "repr.attrib_name"),
+                ("4", "repr.attrib_value"),
+                ("flag", "repr.attrib_name"),
+                ("False", "repr.bool_false"),
+                (")", "repr.brace"),
+            ],
+        ),
+    ],
+)
+def test_highlight(line, expected):
+    assert styles(line) == expected
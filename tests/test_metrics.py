@@ -0,0 +1,61 @@
+import io
+import urllib.request
+
+import pytest
+
+from fortuna import Fortuna
+from fortuna.metrics import serve_prometheus, to_prometheus, write_prometheus
+
+
+@pytest.fixture
+def fortuna():
+    fortuna = Fortuna(seed_file=io.BytesIO(bytes(64)))
+    for i in range(4):
+        for pool in range(32):
+            fortuna.add_random_events(0, [b"\x01" * 32] * 2, [pool])
+        fortuna.last_seed = 0  # skip the minimum interval between reseeds
+        fortuna.random_data(10)
+    return fortuna
+
+
+def test_metrics(fortuna):
+    fortuna.random_into(bytearray(5))
+    metrics = fortuna.metrics()
+    assert metrics["requests"] == 4 + 2  # and the seed file update
+    assert metrics["bytes_generated"] == 4 * 10 + 5 + 64
+    assert metrics["reseeds"] == 4
+    assert metrics["pool_reseeds"][:4] == [4, 2, 1, 0]
+    assert metrics["pool_size_bytes"][:4] == [0, 0, 0, 4 * 2 * 34]
+    assert metrics["reseed_seconds"]["count"] == 4
+    assert 0 < metrics["reseed_seconds"]["max"] <= metrics["reseed_seconds"]["sum"]
+    assert 0 <= metrics["seconds_since_reseed"] < 10
+    assert metrics["seed_file_write_seconds"]["count"] == 1
+
+
+def test_not_seeded():
+    metrics = Fortuna().metrics()
+    assert metrics["seconds_since_reseed"] is None
+    assert "seconds_since_reseed" not in to_prometheus(metrics)
+
+
+def test_prometheus_file(fortuna, tmp_path):
+    path = tmp_path / "fortuna.prom"
+    write_prometheus(fortuna, path)
+    text = path.read_text()
+    assert "fortuna_requests_total 5\n" in text
+    assert 'fortuna_pool_reseeds_total{pool="1"} 2\n' in text
+    assert "fortuna_reseed_seconds_count 4\n" in text
+    assert [p.name for p in tmp_path.iterdir()] == ["fortuna.prom"]
+
+
+def test_prometheus_http(fortuna):
+    server = serve_prometheus(fortuna, port=0)
+    try:
+        url = "http://127.0.0.1:%d/metrics" % server.server_address[1]
+        with urllib.request.urlopen(url) as response:
+            text = response.read().decode()
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert text.startswith("# HELP fortuna_bytes_generated_total")
+    assert "fortuna_requests_total 5\n" in text
@@ -0,0 +1,85 @@
+import io
+import logging
+
+import pytest
+
+from fortuna.tracer import install, trace_method, uninstall
+from fortuna.tracer.recorder import FlightRecorder
+
+from test_tracer import A
+
+
+@pytest.fixture
+def recorder():
+    recorder = install(FlightRecorder(capacity=8))
+    yield recorder
+    uninstall(recorder)
+
+
+def test_render_like_logs(recorder, caplog):
+    a = A()
+    with caplog.at_level(logging.DEBUG, logger="A"):
+        a.level1(2, 3)
+        a.my_attr = 4
+    assert recorder.render() == [record.message for record in caplog.records]
+
+
+def test_not_logged(recorder, caplog):
+    a = A()
+    with caplog.at_level(logging.INFO):
+        a.level1(2, 3)
+    assert caplog.records == []
+    assert recorder.render() == [
+        "A.level1(2, 3) ...",
+        "    A.level3(5) -> 10",
+        "    A.level2_interesting(10) -> 9",
+        "-> 9",
+    ]
+
+
+def test_ring_buffer(recorder):
+    a = A()
+    for i in range(10):
+        a.f_merged(i, 1)
+    assert recorder.render() == [
+        "A.f_merged(%d, 1) -> %d" % (i, i + 1) for i in range(2, 10)
+    ]
+
+
+def test_dump_on_error(recorder):
+    class B:
+        @trace_method(merge=True)
+        def fail(self):
+            raise ValueError("boom")
+
+    file = io.StringIO()
+    with pytest.raises(ValueError), recorder.dump_on_error(file):
+        B().fail()
+    assert (
+        file.getvalue()
+        == "test_dump_on_error.<locals>.B.fail() -X ValueError('boom')\n"
+    )
+
+
+def test_no_buffer_kept(recorder):
+    from fortuna import Fortuna
+
+    recorder.capacity = 64
+    recorder.clear()
+    fortuna = Fortuna()
+    fortuna.generator.reseed(b"Hello")
+    buffer = bytearray(2**16)
+    fortuna.random_into(buffer)
+    buffer.extend(b"x")  # BufferError if a view of it was kept
+    fortuna.random_data(2**16)
+
+    for record in recorder.records():
+        _, _, _, _, _, _, _, args, kwargs, result = record
+        for value in [*args, *kwargs.values(), result]:
+            assert not isinstance(value, (bytearray, memoryview))
+            if isinstance(value, bytes):
+                assert len(value) <= 16
+    lines = recorder.render()
+    assert "Generator.generate_into(bytes=65536) ..." in lines
+    # only the edges of the output are kept, the templates render them trimmed
+    assert lines[-1].startswith("-> 0x<=65536...>")
@@ -0,0 +1,54 @@
+import time
+
+import pytest
+
+from fortuna import Fortuna
+from fortuna.scheduler import ReseedScheduler
+
+
+def add_entropy(fortuna):
+    for i in range(2):
+        fortuna.add_random_event(42, 0, b"X" * 32)
+
+
+def test_request_swaps_prepared_seed():
+    fortuna = Fortuna(thread_safe=True)
+    expected = Fortuna()
+    for f in (fortuna, expected):
+        add_entropy(f)
+
+    scheduler = ReseedScheduler(fortuna)
+    fortuna.reseed_scheduler = scheduler  # as if started, without the thread
+    assert scheduler.prepare()
+    assert not scheduler.prepare()  # the seed is not consumed yet
+    assert len(fortuna.pools[0]) == 0  # hashed out of the request path
+    assert fortuna.generator.counter == 0
+
+    # same result as reseeding in the request path
+    assert fortuna.random_data(32) == expected.random_data(32)
+    assert fortuna.reseed_cnt == expected.reseed_cnt == 1
+
+    # minimum interval between reseeds
+    add_entropy(fortuna)
+    assert not scheduler.prepare()
+
+
+def test_background_thread():
+    fortuna = Fortuna(thread_safe=True)
+    scheduler = ReseedScheduler(fortuna, interval=0.001)
+    scheduler.start()
+    try:
+        add_entropy(fortuna)
+        deadline = time.monotonic() + 5
+        while fortuna._pending_seed is None and time.monotonic() < deadline:
+            time.sleep(0.001)
+        fortuna.random_data(1)
+    finally:
+        scheduler.stop()
+    assert fortuna.reseed_cnt == 1
+    assert fortuna.reseed_scheduler is None
+
+
+def test_not_thread_safe():
+    with pytest.raises(ValueError):
+        ReseedScheduler(Fortuna())
@@ -0,0 +1,91 @@
+import logging
+import threading
+
+import pytest
+
+from fortuna.tracer import Overflow, configure_async_sink
+
+
+class SlowHandler(logging.Handler):
+    """blocks the listener until released"""
+
+    def __init__(self):
+        super().__init__()
+        self.unblock = threading.Event()
+        self.messages = []
+
+    def emit(self, record):
+        self.unblock.wait()
+        self.messages.append(record.getMessage())
+
+
+@pytest.fixture
+def logger():
+    logger = logging.getLogger("test_sink")
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    yield logger
+    logger.handlers.clear()
+
+
+def sink(logger, overflow, maxsize=2):
+    target = SlowHandler()
+    handler = configure_async_sink(
+        target, logger="test_sink", maxsize=maxsize, overflow=overflow
+    )
+    # the listener takes the first record and waits on it
+    logger.debug("first")
+    while not handler.queue.empty():
+        pass
+    return target, handler
+
+
+@pytest.mark.parametrize(
+    "overflow, expected",
+    [
+        (Overflow.DROP, ["first", "0", "1"]),
+        (Overflow.DROP_OLDEST, ["first", "3", "4"]),
+    ],
+)
+def test_overflow(logger, overflow, expected):
+    target, handler = sink(logger, overflow)
+    for i in range(5):
+        logger.debug("%d", i)
+    assert handler.dropped == 3
+    target.unblock.set()
+    handler.close()
+    assert target.messages == expected
+
+
+def test_block(logger):
+    target, handler = sink(logger, Overflow.BLOCK)
+
+    def produce():
+        for i in range(5):
+            logger.debug("%d", i)
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    producer.join(0.05)
+    assert producer.is_alive()  # waiting for room in the queue
+    target.unblock.set()
+    producer.join()
+    handler.close()
+    assert target.messages == ["first", "0", "1", "2", "3", "4"]
+    assert handler.dropped == 0
+
+
+def test_exc_info_kept(logger):
+    target = SlowHandler()
+    target.unblock.set()
+    records = []
+    target.emit = records.append
+    handler = configure_async_sink(target, logger="test_sink")
+    try:
+        1 / 0
+    except ZeroDivisionError:
+        logger.exception("failed %s", "here")
+    handler.close()
+    (record,) = records
+    assert record.getMessage() == "failed here"
+    assert record.exc_info[0] is ZeroDivisionError
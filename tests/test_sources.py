@@ -0,0 +1,105 @@
+import os
+import time
+
+import pytest
+
+from fortuna import Fortuna
+from fortuna.sources import EntropySource, FileDescriptorSource, TimestampSource
+
+
+def test_pool_rotation():
+    fortuna = Fortuna()
+    source = fortuna.sources.register(EntropySource(5))
+    for i in range(33):
+        source.add_event(b"a")
+    assert source.pool == 1
+    assert fortuna.pools[0] == b"\x05\x01a" * 2
+    assert fortuna.pools[31] == b"\x05\x01a"
+
+
+def test_source_id():
+    fortuna = Fortuna()
+    first = fortuna.sources.register(EntropySource(0))
+    second = fortuna.sources.register(TimestampSource())
+    assert second.source_id == 1
+    assert fortuna.sources[0] is first
+    assert list(fortuna.sources) == [first, second]
+
+    with pytest.raises(AssertionError):
+        fortuna.sources.register(EntropySource(1))
+
+
+def test_not_thread_safe():
+    fortuna = Fortuna()
+    fortuna.sources.register(TimestampSource())
+    with pytest.raises(ValueError):
+        fortuna.sources.start()
+
+
+def test_collect_not_implemented():
+    with pytest.raises(NotImplementedError):
+        EntropySource(0).collect()
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+def test_background_collection():
+    fortuna = Fortuna(thread_safe=True)
+    fortuna.sources.register(TimestampSource(interval=0.001))
+    read, write = os.pipe()
+    os.write(write, b"\x01" * 32)
+    fortuna.sources.register(FileDescriptorSource(read, interval=0.001))
+
+    fortuna.sources.start()
+    try:
+        wait_for(lambda: len(fortuna.pools[1]) != 0)
+    finally:
+        # the pipe is empty but open, stop must not hang on the read
+        fortuna.sources.stop()
+    os.close(write)
+    os.close(read)
+
+    assert all(not source.running for source in fortuna.sources)
+    assert b"\x01\x20" + b"\x01" * 32 in fortuna.pools[0]
+    assert fortuna.pools[1]
+
+
+def test_file_closed(tmp_path):
+    path = tmp_path / "device"
+    path.write_bytes(b"\x02" * 8)
+    fortuna = Fortuna(thread_safe=True)
+    source = fortuna.sources.register(FileDescriptorSource(path, interval=0.001))
+    fd = source.fd
+
+    fortuna.sources.start()
+    wait_for(lambda: len(fortuna.pools[0]) != 0)
+    fortuna.sources.unregister(source)
+
+    assert fortuna.pools[0][:10] == b"\x00\x08" + b"\x02" * 8
+    assert len(fortuna.sources) == 0
+    with pytest.raises(OSError):
+        os.fstat(fd)
+
+
+def test_failing_collect(caplog):
+    class Source(EntropySource):
+        calls = 0
+
+        def collect(self):
+            self.calls += 1
+            return b"\x01" * 40  # too long for add_random_event
+
+    fortuna = Fortuna(thread_safe=True)
+    source = fortuna.sources.register(Source(interval=0.001))
+    fortuna.sources.start()
+    try:
+        wait_for(lambda: source.calls > 3)
+        assert source.running
+    finally:
+        fortuna.sources.stop()
+    assert not source.running
+    assert "entropy source Source(source_id=0) failed" in caplog.text
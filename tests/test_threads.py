@@ -0,0 +1,72 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from fortuna import Fortuna
+
+REQUESTS = 300
+
+
+def add_entropy(fortuna, stop):
+    pool = 0
+    while not stop.is_set():
+        fortuna.add_random_event(7, pool, b"\x01" * 32)
+        pool = (pool + 1) % 32
+
+
+def consume(fortuna):
+    return [bytes(fortuna.random_data(16)) for i in range(REQUESTS)]
+
+
+@pytest.mark.parametrize("n_threads", [1, 2, 4, 8])
+def test_stress(n_threads, record_property):
+    """
+    concurrent consumers must never reuse a counter value, even while
+    producers fill the pools and trigger reseeds
+    """
+    fortuna = Fortuna(thread_safe=True)
+    fortuna.generator.reseed(b"Hello")
+
+    stop = threading.Event()
+    producer = threading.Thread(target=add_entropy, args=(fortuna, stop))
+    producer.start()
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(n_threads) as executor:
+            results = list(executor.map(consume, [fortuna] * n_threads))
+        elapsed = time.perf_counter() - start
+    finally:
+        stop.set()
+        producer.join()
+
+    outputs = [r for result in results for r in result]
+    assert len(outputs) == n_threads * REQUESTS
+    assert len(set(outputs)) == len(outputs)
+    # one pseudo_randomdata per request: one block of output and two of rekey
+    assert fortuna.generator.counter == 1 + fortuna.reseed_cnt + 3 * len(outputs)
+
+    # scaling with the number of threads, see `pytest --junit-xml`
+    record_property("requests_per_second", round(len(outputs) / elapsed, 1))
+
+
+def test_same_source_producers():
+    """producers of the same source share the rotation without overlapping"""
+    fortuna = Fortuna(thread_safe=True)
+    n_threads = 8
+    barrier = threading.Barrier(n_threads)
+
+    def produce():
+        barrier.wait()
+        for i in range(200):
+            fortuna.add_random_events(7, [b"\x01"] * 4)
+
+    threads = [threading.Thread(target=produce) for i in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # 8 * 200 * 4 events spread evenly over the 32 pools
+    assert {len(pool) for pool in fortuna.pools} == {200 * 3}
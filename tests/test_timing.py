@@ -0,0 +1,93 @@
+import io
+import time
+
+import pytest
+
+from fortuna import tracer
+from fortuna.tracer import trace_function
+from fortuna.tracer.timing import FunctionStats, bucket, bucket_limit
+
+
+@trace_function
+def child():
+    time.sleep(0.002)
+
+
+@trace_function
+def parent():
+    child()
+    child()
+
+
+@pytest.fixture
+def collector():
+    yield tracer.enable_stats()
+    tracer.disable_stats()
+
+
+def test_self_time(collector):
+    parent()
+    stats = tracer.stats()
+    assert stats["child"].calls == 2
+    assert stats["parent"].calls == 1
+    assert stats["parent"].total_ns >= stats["child"].total_ns >= 4_000_000
+    # the children are excluded from the self time of the parent
+    assert stats["parent"].self_ns < stats["child"].total_ns
+    assert stats["child"].self_ns == stats["child"].total_ns
+
+    out = io.StringIO()
+    tracer.print_stats(out)
+    lines = out.getvalue().splitlines()
+    assert lines[0].split()[0] == "function"
+    assert {line.split()[0] for line in lines[1:]} == {"parent", "child"}
+
+
+def test_disabled():
+    parent()
+    assert tracer.stats() == {}
+
+
+def test_percentiles():
+    f = FunctionStats()
+    for ns in range(1, 1001):
+        f.add(ns, ns)
+    s = f.snapshot()
+    assert s.max_ns == 1000
+    # within the resolution of the histogram
+    assert 500 <= s.p50_ns <= 500 * 1.25
+    assert 990 <= s.p99_ns <= 1000
+
+
+@pytest.mark.parametrize("ns", [0, 1, 7, 8, 100, 12345, 2**40 + 3])
+def test_bucket(ns):
+    index = bucket(ns)
+    assert bucket_limit(index) >= ns
+    assert index == 0 or bucket_limit(index - 1) < ns
+
+
+def test_toggle_during_call():
+    from fortuna.tracer.recorder import FlightRecorder
+
+    # another collector makes the outer call go through the tracer
+    recorder = tracer.install(FlightRecorder())
+
+    @trace_function
+    def enable():
+        tracer.enable_stats()
+        child()
+
+    @trace_function
+    def disable():
+        tracer.disable_stats()
+
+    try:
+        enable()
+        assert set(tracer.stats()) == {"child"}
+        parent()
+        disable()
+        tracer.enable_stats()
+        parent()
+        assert tracer.stats()["parent"].calls == 1
+    finally:
+        tracer.disable_stats()
+        tracer.uninstall(recorder)
@@ -46,7 +46,7 @@ class A:
 def reset_indent():
     import fortuna.tracer
 
-    fortuna.tracer.nesting = -1
+    fortuna.tracer.nesting.set(-1)
 
 
 @pytest.fixture
@@ -232,3 +232,170 @@ A.level1(2, 3) ...
 """ == "\n".join(
         record.message for record in caplog.records
     )
+
+
+def test_disabled(monkeypatch):
+    import fortuna.tracer
+
+    monkeypatch.setattr(fortuna.tracer, "ENABLED", False)
+
+    def foo(a):
+        return a
+
+    assert trace_function(foo) is foo
+    assert trace_function(args_fmt="a={a}")(foo) is foo
+    prop = property(foo)
+    assert trace_property(prop) is prop
+    assert trace_property(value_fmt="{}")(prop) is prop
+
+
+def test_not_formatted_if_not_logged(caplog):
+    calls = []
+
+    class Fmt:
+        def format(self, *args, **kwargs):
+            calls.append(args)
+            return ""
+
+    @trace_function(args_fmt=Fmt(), ret_fmt=Fmt())
+    def foo(a):
+        return a
+
+    with caplog.at_level(logging.INFO):
+        assert foo(1) == 1
+    assert calls == []
+    with caplog.at_level(logging.DEBUG):
+        foo(1)
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize("enabled", [True, False])
+def test_traced_slots(monkeypatch, enabled):
+    import fortuna.tracer
+
+    monkeypatch.setattr(fortuna.tracer, "ENABLED", enabled)
+
+    @traced_slots
+    class B:
+        __slots__ = ("plain",)
+        traced = TracedSet()
+
+    b = B()
+    b.plain = 1
+    b.traced = 2
+    assert (b.plain, b.traced) == (1, 2)
+    with pytest.raises(AttributeError):
+        b.other = 3
+
+    if enabled:
+        assert B.__slots__ == ("plain", "_traced")
+        assert isinstance(B.__dict__["traced"], TracedSet)
+        assert B.__dict__["traced"].owner is B
+    else:
+        assert B.__slots__ == ("plain", "traced")
+        assert not isinstance(B.__dict__["traced"], TracedSet)
+
+
+def test_threads_indent(caplog):
+    """each thread has its own call tree and trace id"""
+    import threading
+
+    a = A()
+    barrier = threading.Barrier(2)
+
+    @trace_function
+    def run():
+        barrier.wait()
+        a.level1(2, 3)
+
+    with caplog.at_level(logging.DEBUG):
+        threads = [threading.Thread(target=run) for i in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    traces = {}
+    for record in caplog.records:
+        traces.setdefault(record.trace_id, []).append(record.message)
+    assert len(traces) == 2
+    for messages in traces.values():
+        assert messages == [
+            "test_threads_indent.<locals>.run() ...",
+            "    A.level1(2, 3) ...",
+            "        A.level3(5) -> 10",
+            "        A.level2_interesting(10) -> 9",
+            "    -> 9",
+            "-> None",
+        ]
+
+
+@pytest.fixture
+def max_depth():
+    import fortuna.tracer
+
+    fortuna.tracer.set_max_depth(0)
+    yield
+    fortuna.tracer.set_max_depth(None)
+
+
+def test_max_depth(caplog, max_depth):
+    a = A()
+    with caplog.at_level(logging.DEBUG):
+        a.level1(2, 3)
+        a.level1(2, 3)
+    assert [record.message for record in caplog.records] == [
+        "A.level1(2, 3) ...",
+        "    A.level3 ×1",
+        "    A.level2_interesting ×1",
+        "-> 9",
+    ] * 2
+
+
+def test_sample(caplog):
+    @trace_function(sample=3)
+    def f(i):
+        return g(i)
+
+    @trace_function(merge=True)
+    def g(i):
+        return i
+
+    with caplog.at_level(logging.DEBUG):
+        for i in range(7):
+            f(i)
+    # the children of a dropped call are dropped too
+    assert [record.message for record in caplog.records if "g" in record.message] == [
+        "    test_sample.<locals>.g(0) -> 0",
+        "    test_sample.<locals>.g(3) -> 3",
+        "    test_sample.<locals>.g(6) -> 6",
+    ]
+
+
+def test_rate_limit(caplog):
+    @trace_function(merge=True, rate_limit=5)
+    def f():
+        pass
+
+    with caplog.at_level(logging.DEBUG):
+        for i in range(20):
+            f()
+    # unless a second boundary is crossed while looping
+    assert len(caplog.records) in (5, 10)
+
+
+def test_signature_inspected_once(caplog, monkeypatch):
+    import fortuna.tracer
+
+    @trace_function(args_fmt="b={b}", merge=True)
+    def f(a, b=2):
+        return a
+
+    def fail(func):
+        raise AssertionError("signature inspected when tracing")
+
+    monkeypatch.setattr(fortuna.tracer, "get_binder", fail)
+    with caplog.at_level(logging.DEBUG):
+        f(1)
+    (record,) = caplog.records
+    assert record.message == "test_signature_inspected_once.<locals>.f(b=2) -> 1"